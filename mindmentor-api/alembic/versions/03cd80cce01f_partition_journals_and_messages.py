@@ -0,0 +1,249 @@
+"""partition journals and messages by created_at
+
+Revision ID: 03cd80cce01f
+Revises: 8c1eda529473
+Create Date: 2026-10-18 15:02:41.118204
+
+Rebuilds app.journals and app.messages as monthly RANGE partitions on
+created_at, copying the existing rows. The copy holds an ACCESS EXCLUSIVE
+lock on both tables for its duration: run it in a maintenance window.
+
+The primary keys become (id, created_at) because a partitioned table's
+unique constraints must include the partition key. journal_tags can no
+longer reference journals by foreign key, so its ON DELETE CASCADE is
+replaced by a statement-level AFTER DELETE trigger on journals.
+
+app.ensure_monthly_partitions() creates the missing months up to N ahead;
+app.partitions calls it on a schedule. Rows outside every monthly range
+(e.g. an import of very old entries) land in <table>_default, and are
+moved out if their month is created later.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '03cd80cce01f'
+down_revision: Union[str, None] = '8c1eda529473'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+ENSURE_PARTITIONS = """
+CREATE OR REPLACE FUNCTION app.ensure_monthly_partitions(parent regclass, first_month date, months_ahead int)
+RETURNS int LANGUAGE plpgsql AS $$
+DECLARE
+    nsp text;
+    rel text;
+    default_part regclass;
+    cols text;
+    m date := date_trunc('month', first_month)::date;
+    last_month date := (date_trunc('month', now()) + make_interval(months => months_ahead))::date;
+    part text;
+    created int := 0;
+BEGIN
+    SELECT n.nspname, c.relname INTO nsp, rel
+      FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+     WHERE c.oid = parent;
+    default_part := to_regclass(format('%I.%I', nsp, rel || '_default'));
+    -- generated columns (journals.content_tsv) cannot be inserted explicitly
+    SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum) INTO cols
+      FROM pg_attribute
+     WHERE attrelid = parent AND attnum > 0 AND NOT attisdropped AND attgenerated = '';
+
+    WHILE m <= last_month LOOP
+        part := format('%s_p%s', rel, to_char(m, 'YYYYMM'));
+        IF to_regclass(format('%I.%I', nsp, part)) IS NULL THEN
+            -- the new range cannot be attached while the default partition holds rows for it
+            IF default_part IS NOT NULL THEN
+                EXECUTE format(
+                    'CREATE TEMP TABLE _partition_moved ON COMMIT DROP AS '
+                    'WITH d AS (DELETE FROM %s WHERE created_at >= %L AND created_at < %L RETURNING %s) '
+                    'SELECT * FROM d',
+                    default_part, m::timestamp, (m + interval '1 month')::timestamp, cols);
+            END IF;
+            EXECUTE format('CREATE TABLE %I.%I PARTITION OF %s FOR VALUES FROM (%L) TO (%L)',
+                           nsp, part, parent, m::timestamp, (m + interval '1 month')::timestamp);
+            IF default_part IS NOT NULL THEN
+                EXECUTE format('INSERT INTO %s (%s) SELECT %s FROM _partition_moved', parent, cols, cols);
+                DROP TABLE _partition_moved;
+            END IF;
+            created := created + 1;
+        END IF;
+        m := (m + interval '1 month')::date;
+    END LOOP;
+    RETURN created;
+END
+$$;
+"""
+
+DELETE_TAG_LINKS = """
+CREATE OR REPLACE FUNCTION app.journals_delete_tag_links() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    DELETE FROM app.journal_tags jt USING old_rows o WHERE jt.journal_id = o.journal_id;
+    RETURN NULL;
+END
+$$;
+"""
+
+
+def _first_month(table: str) -> str:
+    # Partitions start at the oldest existing row's month (or the current month)
+    return f"COALESCE((SELECT min(created_at) FROM app.{table}_old), now())::date"
+
+
+def upgrade() -> None:
+    op.execute(ENSURE_PARTITIONS)
+    op.execute(DELETE_TAG_LINKS)
+    op.drop_constraint('fk_journal_tags_journal_id_journals', 'journal_tags', schema='app', type_='foreignkey')
+
+    # ---- journals ----
+    op.execute("ALTER TABLE app.journals RENAME TO journals_old")
+    op.execute("ALTER TABLE app.journals_old RENAME CONSTRAINT pk_journals TO pk_journals_old")
+    op.execute("ALTER INDEX app.ix_journals_user_id_created_at RENAME TO ix_journals_old_user_id_created_at")
+    op.execute("ALTER INDEX app.ix_journals_content_tsv RENAME TO ix_journals_old_content_tsv")
+    op.execute("""
+        CREATE TABLE app.journals (
+            journal_id uuid NOT NULL DEFAULT gen_random_uuid(),
+            user_id uuid NOT NULL,
+            content text NOT NULL,
+            mood smallint,
+            created_at timestamp without time zone NOT NULL DEFAULT now(),
+            content_tsv tsvector GENERATED ALWAYS AS (to_tsvector('english', content)) STORED,
+            CONSTRAINT pk_journals PRIMARY KEY (journal_id, created_at),
+            CONSTRAINT ck_journals_ck_journals_mood CHECK (mood IS NULL OR mood BETWEEN 1 AND 10),
+            CONSTRAINT fk_journals_user_id_users FOREIGN KEY (user_id)
+                REFERENCES app.users (user_id) ON DELETE CASCADE
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("CREATE TABLE app.journals_default PARTITION OF app.journals DEFAULT")
+    op.execute(f"SELECT app.ensure_monthly_partitions('app.journals', {_first_month('journals')}, {MONTHS_AHEAD})")
+    op.execute("""
+        INSERT INTO app.journals (journal_id, user_id, content, mood, created_at)
+        SELECT journal_id, user_id, content, mood, created_at FROM app.journals_old
+    """)
+    op.drop_table('journals_old', schema='app')
+    # Indexes on the parent cascade to every partition, present and future
+    op.create_index(
+        'ix_journals_user_id_created_at',
+        'journals',
+        ['user_id', sa.text('created_at DESC'), sa.text('journal_id DESC')],
+        unique=False,
+        schema='app',
+    )
+    op.create_index('ix_journals_content_tsv', 'journals', ['content_tsv'], unique=False, schema='app', postgresql_using='gin')
+    op.execute("""
+        CREATE TRIGGER trg_journals_delete_tag_links
+        AFTER DELETE ON app.journals
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION app.journals_delete_tag_links()
+    """)
+
+    # ---- messages ----
+    op.execute("ALTER TABLE app.messages RENAME TO messages_old")
+    op.execute("ALTER TABLE app.messages_old RENAME CONSTRAINT pk_messages TO pk_messages_old")
+    op.execute("ALTER INDEX app.ix_messages_session_id_created_at RENAME TO ix_messages_old_session_id_created_at")
+    op.execute("""
+        CREATE TABLE app.messages (
+            message_id uuid NOT NULL DEFAULT gen_random_uuid(),
+            session_id uuid NOT NULL,
+            role varchar(16) NOT NULL,
+            content text NOT NULL,
+            created_at timestamp without time zone NOT NULL DEFAULT now(),
+            CONSTRAINT pk_messages PRIMARY KEY (message_id, created_at),
+            CONSTRAINT ck_messages_ck_messages_role CHECK (role IN ('user','mentor','system')),
+            CONSTRAINT fk_messages_session_id_sessions FOREIGN KEY (session_id)
+                REFERENCES app.sessions (session_id) ON DELETE CASCADE
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("CREATE TABLE app.messages_default PARTITION OF app.messages DEFAULT")
+    op.execute(f"SELECT app.ensure_monthly_partitions('app.messages', {_first_month('messages')}, {MONTHS_AHEAD})")
+    op.execute("""
+        INSERT INTO app.messages (message_id, session_id, role, content, created_at)
+        SELECT message_id, session_id, role, content, created_at FROM app.messages_old
+    """)
+    op.drop_table('messages_old', schema='app')
+    op.create_index(
+        'ix_messages_session_id_created_at',
+        'messages',
+        ['session_id', sa.text('created_at DESC'), sa.text('message_id DESC')],
+        unique=False,
+        schema='app',
+    )
+    op.execute("ANALYZE app.journals")
+    op.execute("ANALYZE app.messages")
+
+
+def downgrade() -> None:
+    # Detached/archived partitions are not brought back
+    op.execute("ALTER TABLE app.messages RENAME TO messages_part")
+    op.execute("ALTER TABLE app.messages_part RENAME CONSTRAINT pk_messages TO pk_messages_part")
+    op.execute("ALTER INDEX app.ix_messages_session_id_created_at RENAME TO ix_messages_part_session_id_created_at")
+    op.create_table('messages',
+    sa.Column('message_id', sa.UUID(as_uuid=False), server_default=sa.text('gen_random_uuid()'), nullable=False),
+    sa.Column('session_id', sa.UUID(as_uuid=False), nullable=False),
+    sa.Column('role', sa.String(length=16), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.CheckConstraint("role IN ('user','mentor','system')", name=op.f('ck_messages_ck_messages_role')),
+    sa.ForeignKeyConstraint(['session_id'], ['app.sessions.session_id'], name=op.f('fk_messages_session_id_sessions'), ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('message_id', name=op.f('pk_messages')),
+    schema='app'
+    )
+    op.execute("""
+        INSERT INTO app.messages (message_id, session_id, role, content, created_at)
+        SELECT message_id, session_id, role, content, created_at FROM app.messages_part
+    """)
+    op.execute("DROP TABLE app.messages_part")
+    op.create_index(
+        'ix_messages_session_id_created_at',
+        'messages',
+        ['session_id', sa.text('created_at DESC'), sa.text('message_id DESC')],
+        unique=False,
+        schema='app',
+    )
+
+    op.execute("ALTER TABLE app.journals RENAME TO journals_part")
+    op.execute("ALTER TABLE app.journals_part RENAME CONSTRAINT pk_journals TO pk_journals_part")
+    op.execute("ALTER INDEX app.ix_journals_user_id_created_at RENAME TO ix_journals_part_user_id_created_at")
+    op.execute("ALTER INDEX app.ix_journals_content_tsv RENAME TO ix_journals_part_content_tsv")
+    op.create_table('journals',
+    sa.Column('journal_id', sa.UUID(as_uuid=False), server_default=sa.text('gen_random_uuid()'), nullable=False),
+    sa.Column('user_id', sa.UUID(as_uuid=False), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('mood', sa.SmallInteger(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.CheckConstraint('mood IS NULL OR mood BETWEEN 1 AND 10', name=op.f('ck_journals_ck_journals_mood')),
+    sa.ForeignKeyConstraint(['user_id'], ['app.users.user_id'], name=op.f('fk_journals_user_id_users'), ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('journal_id', name=op.f('pk_journals')),
+    schema='app'
+    )
+    op.execute("""
+        ALTER TABLE app.journals ADD COLUMN content_tsv tsvector
+        GENERATED ALWAYS AS (to_tsvector('english', content)) STORED
+    """)
+    op.execute("""
+        INSERT INTO app.journals (journal_id, user_id, content, mood, created_at)
+        SELECT journal_id, user_id, content, mood, created_at FROM app.journals_part
+    """)
+    # Also drops the tag-link trigger
+    op.execute("DROP TABLE app.journals_part")
+    op.create_index(
+        'ix_journals_user_id_created_at',
+        'journals',
+        ['user_id', sa.text('created_at DESC'), sa.text('journal_id DESC')],
+        unique=False,
+        schema='app',
+    )
+    op.create_index('ix_journals_content_tsv', 'journals', ['content_tsv'], unique=False, schema='app', postgresql_using='gin')
+    # Links to journals that no longer exist (archived partitions) would block the FK
+    op.execute("DELETE FROM app.journal_tags jt WHERE NOT EXISTS (SELECT 1 FROM app.journals j WHERE j.journal_id = jt.journal_id)")
+    op.create_foreign_key(
+        'fk_journal_tags_journal_id_journals', 'journal_tags', 'journals',
+        ['journal_id'], ['journal_id'], source_schema='app', referent_schema='app', ondelete='CASCADE',
+    )
+    op.execute("DROP FUNCTION app.journals_delete_tag_links()")
+    op.execute("DROP FUNCTION app.ensure_monthly_partitions(regclass, date, int)")
@@ -0,0 +1,66 @@
+"""journal analytics rollups
+
+Revision ID: 1eca9fd9e9b8
+Revises: b1a4315d8414
+Create Date: 2026-10-18 10:41:52.019374
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1eca9fd9e9b8'
+down_revision: Union[str, None] = 'b1a4315d8414'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('journal_mood_rollups',
+    sa.Column('user_id', sa.UUID(as_uuid=False), nullable=False),
+    sa.Column('granularity', sa.String(length=5), nullable=False),
+    sa.Column('period_start', sa.Date(), nullable=False),
+    sa.Column('entry_count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('mood_count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('mood_sum', sa.BIGINT(), server_default=sa.text('0'), nullable=False),
+    sa.CheckConstraint("granularity IN ('day','week','month')", name=op.f('ck_journal_mood_rollups_ck_journal_mood_rollups_granularity')),
+    sa.ForeignKeyConstraint(['user_id'], ['app.users.user_id'], name=op.f('fk_journal_mood_rollups_user_id_users'), ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'granularity', 'period_start', name=op.f('pk_journal_mood_rollups')),
+    schema='app'
+    )
+    op.create_table('user_tag_counts',
+    sa.Column('user_id', sa.UUID(as_uuid=False), nullable=False),
+    sa.Column('tag_id', sa.BIGINT(), nullable=False),
+    sa.Column('entry_count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.ForeignKeyConstraint(['tag_id'], ['app.tags.tag_id'], name=op.f('fk_user_tag_counts_tag_id_tags'), ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['app.users.user_id'], name=op.f('fk_user_tag_counts_user_id_users'), ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'tag_id', name=op.f('pk_user_tag_counts')),
+    schema='app'
+    )
+    op.create_index('ix_user_tag_counts_user_id_entry_count', 'user_tag_counts', ['user_id', sa.text('entry_count DESC')], unique=False, schema='app')
+
+    # Backfill from existing history; from here on app.analytics keeps them current
+    op.execute("""
+        INSERT INTO app.journal_mood_rollups (user_id, granularity, period_start, entry_count, mood_count, mood_sum)
+        SELECT j.user_id, g.granularity, date_trunc(g.granularity, j.created_at)::date,
+               count(*), count(j.mood), coalesce(sum(j.mood), 0)
+        FROM app.journals j
+        CROSS JOIN (VALUES ('day'), ('week'), ('month')) AS g(granularity)
+        GROUP BY 1, 2, 3
+    """)
+    op.execute("""
+        INSERT INTO app.user_tag_counts (user_id, tag_id, entry_count)
+        SELECT j.user_id, jt.tag_id, count(*)
+        FROM app.journal_tags jt
+        JOIN app.journals j ON j.journal_id = jt.journal_id
+        GROUP BY 1, 2
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_tag_counts_user_id_entry_count', table_name='user_tag_counts', schema='app')
+    op.drop_table('user_tag_counts', schema='app')
+    op.drop_table('journal_mood_rollups', schema='app')
@@ -0,0 +1,27 @@
+"""journals content_vec
+
+Revision ID: 38953bbd3583
+Revises: 9a40bf65627d
+Create Date: 2026-10-18 17:34:40.882517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '38953bbd3583'
+down_revision: Union[str, None] = '9a40bf65627d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Nullable, no default: instant. Existing rows: python -m app.similarity
+    op.add_column('journals', sa.Column('content_vec', sa.LargeBinary(), nullable=True), schema='app')
+
+
+def downgrade() -> None:
+    op.drop_column('journals', 'content_vec', schema='app')
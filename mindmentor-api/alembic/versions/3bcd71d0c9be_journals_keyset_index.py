@@ -0,0 +1,33 @@
+"""journals keyset index
+
+Revision ID: 3bcd71d0c9be
+Revises: 6827ab02a4d9
+Create Date: 2026-10-18 09:12:41.204511
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3bcd71d0c9be'
+down_revision: Union[str, None] = '6827ab02a4d9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Matches list_journals: WHERE user_id = ? ORDER BY created_at DESC, journal_id DESC
+    op.create_index(
+        'ix_journals_user_id_created_at',
+        'journals',
+        ['user_id', sa.text('created_at DESC'), sa.text('journal_id DESC')],
+        unique=False,
+        schema='app',
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_journals_user_id_created_at', table_name='journals', schema='app')
@@ -0,0 +1,48 @@
+"""sync change_seq and tombstones
+
+Revision ID: 457fe540dec2
+Revises: e231e7ad70ba
+Create Date: 2026-10-18 16:21:55.204117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '457fe540dec2'
+down_revision: Union[str, None] = 'e231e7ad70ba'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing rows get change_seq 0 (metadata-only default); /sync breaks
+    # the tie by id, so a first full sync still pages through them
+    op.add_column('journals', sa.Column('change_seq', sa.BIGINT(), server_default=sa.text('0'), nullable=False), schema='app')
+    op.add_column('sessions', sa.Column('change_seq', sa.BIGINT(), server_default=sa.text('0'), nullable=False), schema='app')
+    op.create_table('tombstones',
+    sa.Column('user_id', sa.UUID(as_uuid=False), nullable=False),
+    sa.Column('entity', sa.String(length=16), nullable=False),
+    sa.Column('entity_id', sa.UUID(as_uuid=False), nullable=False),
+    sa.Column('change_seq', sa.BIGINT(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.CheckConstraint("entity IN ('journal','session')", name=op.f('ck_tombstones_ck_tombstones_entity')),
+    sa.ForeignKeyConstraint(['user_id'], ['app.users.user_id'], name=op.f('fk_tombstones_user_id_users'), ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'entity', 'entity_id', name=op.f('pk_tombstones')),
+    schema='app'
+    )
+    op.create_index('ix_tombstones_user_id_change_seq', 'tombstones', ['user_id', 'change_seq'], unique=False, schema='app')
+    op.create_index('ix_journals_user_id_change_seq', 'journals', ['user_id', 'change_seq', 'journal_id'], unique=False, schema='app')
+    op.create_index('ix_sessions_user_id_change_seq', 'sessions', ['user_id', 'change_seq', 'session_id'], unique=False, schema='app')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sessions_user_id_change_seq', table_name='sessions', schema='app')
+    op.drop_index('ix_journals_user_id_change_seq', table_name='journals', schema='app')
+    op.drop_index('ix_tombstones_user_id_change_seq', table_name='tombstones', schema='app')
+    op.drop_table('tombstones', schema='app')
+    op.drop_column('sessions', 'change_seq', schema='app')
+    op.drop_column('journals', 'change_seq', schema='app')
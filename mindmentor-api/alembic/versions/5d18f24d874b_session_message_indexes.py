@@ -0,0 +1,42 @@
+"""session and message indexes
+
+Revision ID: 5d18f24d874b
+Revises: 1eca9fd9e9b8
+Create Date: 2026-10-18 12:15:06.731140
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d18f24d874b'
+down_revision: Union[str, None] = '1eca9fd9e9b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Newest-first message history per session (keyset on created_at, message_id)
+    op.create_index(
+        'ix_messages_session_id_created_at',
+        'messages',
+        ['session_id', sa.text('created_at DESC'), sa.text('message_id DESC')],
+        unique=False,
+        schema='app',
+    )
+    # Newest-first session list per user
+    op.create_index(
+        'ix_sessions_user_id_started_at',
+        'sessions',
+        ['user_id', sa.text('started_at DESC')],
+        unique=False,
+        schema='app',
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sessions_user_id_started_at', table_name='sessions', schema='app')
+    op.drop_index('ix_messages_session_id_created_at', table_name='messages', schema='app')
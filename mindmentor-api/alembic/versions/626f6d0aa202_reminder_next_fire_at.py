@@ -0,0 +1,35 @@
+"""reminder next_fire_at
+
+Revision ID: 626f6d0aa202
+Revises: 5d18f24d874b
+Create Date: 2026-10-18 13:02:44.918273
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '626f6d0aa202'
+down_revision: Union[str, None] = '5d18f24d874b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('reminders', sa.Column('next_fire_at', postgresql.TIMESTAMP(timezone=True), nullable=True), schema='app')
+    op.add_column('reminders', sa.Column('last_fired_at', postgresql.TIMESTAMP(timezone=True), nullable=True), schema='app')
+    # Serves both the due scan (next_fire_at <= now()) and priming (next_fire_at IS NULL)
+    op.create_index(
+        'ix_reminders_next_fire_at', 'reminders', ['next_fire_at'],
+        unique=False, schema='app', postgresql_where=sa.text('is_active'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reminders_next_fire_at', table_name='reminders', schema='app', postgresql_where=sa.text('is_active'))
+    op.drop_column('reminders', 'last_fired_at', schema='app')
+    op.drop_column('reminders', 'next_fire_at', schema='app')
@@ -0,0 +1,27 @@
+"""tags name prefix index
+
+Revision ID: 8c1eda529473
+Revises: 626f6d0aa202
+Create Date: 2026-10-18 13:48:20.377415
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c1eda529473'
+down_revision: Union[str, None] = '626f6d0aa202'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Byte-order index: usable for name COLLATE "C" LIKE 'prefix%' and its ORDER BY
+    op.create_index('ix_tags_name_c', 'tags', [sa.text('name COLLATE "C"')], unique=False, schema='app')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tags_name_c', table_name='tags', schema='app')
@@ -0,0 +1,60 @@
+"""email and foreign key indexes
+
+Revision ID: 9a40bf65627d
+Revises: 457fe540dec2
+Create Date: 2026-10-18 16:58:03.640921
+
+Built CONCURRENTLY (outside a transaction), so writes continue while they
+build. A failed concurrent build leaves an INVALID index behind; each one
+is dropped first so re-running the migration recovers.
+
+journals.user_id, sessions.user_id and messages.session_id are already the
+leading columns of the keyset indexes (and journals/messages are
+partitioned, where CONCURRENTLY is not available), so only the foreign keys
+without any covering index are added here.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a40bf65627d'
+down_revision: Union[str, None] = '457fe540dec2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# What app.accounts.normalize_email() produces
+NORMALIZED = "lower(trim(email))"
+
+INDEXES = [
+    # (name, table, definition)
+    ('ix_users_email_lower', 'users', 'UNIQUE INDEX CONCURRENTLY ix_users_email_lower ON app.users (lower(email))'),
+    ('ix_reminders_user_id', 'reminders', 'INDEX CONCURRENTLY ix_reminders_user_id ON app.reminders (user_id)'),
+    ('ix_journal_tags_tag_id', 'journal_tags', 'INDEX CONCURRENTLY ix_journal_tags_tag_id ON app.journal_tags (tag_id)'),
+]
+
+
+def upgrade() -> None:
+    # Check the same expression the UPDATE writes: addresses differing only in
+    # case or surrounding whitespace would collide in the unique index
+    dupes = op.get_bind().execute(sa.text(
+        f"SELECT {NORMALIZED} FROM app.users GROUP BY {NORMALIZED} HAVING count(*) > 1 LIMIT 5"
+    )).scalars().all()
+    if dupes:
+        raise RuntimeError(f"users.email has duplicates after normalization, merge them first: {dupes}")
+    # Stored emails are normalized from now on (app.accounts), so the index
+    # on lower(email) matches them
+    op.execute(f"UPDATE app.users SET email = {NORMALIZED} WHERE email <> {NORMALIZED}")
+
+    with op.get_context().autocommit_block():
+        for name, _, definition in INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS app.{name}")
+            op.execute(f"CREATE {definition}")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, _, _ in reversed(INDEXES):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS app.{name}")
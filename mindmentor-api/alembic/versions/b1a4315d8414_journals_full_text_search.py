@@ -0,0 +1,33 @@
+"""journals full text search
+
+Revision ID: b1a4315d8414
+Revises: 3bcd71d0c9be
+Create Date: 2026-10-18 10:03:17.558902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b1a4315d8414'
+down_revision: Union[str, None] = '3bcd71d0c9be'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Stored generated column: rewrites the table once, then Postgres keeps it in sync
+    op.add_column('journals',
+    sa.Column('content_tsv', postgresql.TSVECTOR(), sa.Computed("to_tsvector('english', content)", persisted=True), nullable=True),
+    schema='app'
+    )
+    op.create_index('ix_journals_content_tsv', 'journals', ['content_tsv'], unique=False, schema='app', postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_journals_content_tsv', table_name='journals', schema='app', postgresql_using='gin')
+    op.drop_column('journals', 'content_tsv', schema='app')
@@ -0,0 +1,42 @@
+"""account deletions
+
+Revision ID: c4e81f2a9d57
+Revises: 38953bbd3583
+Create Date: 2026-10-18 18:02:11.406731
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e81f2a9d57'
+down_revision: Union[str, None] = '38953bbd3583'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('account_deletions',
+    sa.Column('deletion_id', postgresql.UUID(as_uuid=False), server_default=sa.text('gen_random_uuid()'), nullable=False),
+    sa.Column('user_id', postgresql.UUID(as_uuid=False), nullable=False),
+    sa.Column('status', sa.String(length=16), server_default=sa.text("'pending'"), nullable=False),
+    sa.Column('phase', sa.String(length=32), nullable=True),
+    sa.Column('rows_deleted', sa.BIGINT(), server_default=sa.text('0'), nullable=False),
+    sa.Column('requested_at', postgresql.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', postgresql.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('finished_at', postgresql.TIMESTAMP(timezone=True), nullable=True),
+    sa.CheckConstraint("status IN ('pending','running','done')", name=op.f('ck_account_deletions_ck_account_deletions_status')),
+    sa.PrimaryKeyConstraint('deletion_id', name=op.f('pk_account_deletions')),
+    sa.UniqueConstraint('user_id', name=op.f('uq_account_deletions_user_id')),
+    schema='app'
+    )
+    op.create_index('ix_account_deletions_requested_at', 'account_deletions', ['requested_at'], unique=False, schema='app', postgresql_where=sa.text("status <> 'done'"))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_account_deletions_requested_at', table_name='account_deletions', schema='app', postgresql_where=sa.text("status <> 'done'"))
+    op.drop_table('account_deletions', schema='app')
@@ -0,0 +1,30 @@
+"""users data version
+
+Revision ID: e231e7ad70ba
+Revises: 03cd80cce01f
+Create Date: 2026-10-18 15:40:12.507833
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e231e7ad70ba'
+down_revision: Union[str, None] = '03cd80cce01f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Constant defaults: metadata-only on Postgres 11+, no table rewrite
+    op.add_column('users', sa.Column('data_version', sa.BIGINT(), server_default=sa.text('0'), nullable=False), schema='app')
+    op.add_column('users', sa.Column('data_modified_at', postgresql.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False), schema='app')
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'data_modified_at', schema='app')
+    op.drop_column('users', 'data_version', schema='app')
@@ -0,0 +1,144 @@
+# app/account_purge.py
+"""
+Background purge of deleted accounts.
+
+DELETE /users/me only deactivates the user and queues an account_deletions
+row; relying on ON DELETE CASCADE from app.users would remove years of
+journals, messages and tag links in one transaction, holding locks and
+writing one huge burst of WAL. This worker removes the data instead in
+small transactions:
+
+    DELETE FROM <table> WHERE (pk) IN (SELECT pk ... WHERE <user's rows> LIMIT :batch)
+
+one table (phase) at a time, children before parents, then finally the
+users row itself. Each batch also records phase and rows_deleted on the
+job row, so progress is visible (GET /users/deletions/{id}) and a restarted
+worker resumes where the last commit left off. Jobs are claimed with
+FOR UPDATE SKIP LOCKED, so several workers can run. A pause between
+batches keeps the purge from competing with live traffic.
+
+Run standalone:
+
+    python -m app.account_purge
+"""
+import asyncio
+import logging
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.db import SessionLocal
+from app.models import (
+    AccountDeletion, Journal, JournalMoodRollup, Message, Reminder, Session as ChatSession,
+    Tombstone, User, UserTagCount,
+)
+
+log = logging.getLogger("mindmentor.account_purge")
+
+# (phase, model, rows belonging to the user). journal_tags rows go with their
+# journals via the trg_journals_delete_tag_links trigger.
+PHASES: List[Tuple[str, type, Callable]] = [
+    ("messages", Message,
+     lambda uid: Message.session_id.in_(select(ChatSession.session_id).where(ChatSession.user_id == uid))),
+    ("journals", Journal, lambda uid: Journal.user_id == uid),
+    ("sessions", ChatSession, lambda uid: ChatSession.user_id == uid),
+    ("reminders", Reminder, lambda uid: Reminder.user_id == uid),
+    ("tombstones", Tombstone, lambda uid: Tombstone.user_id == uid),
+    ("journal_mood_rollups", JournalMoodRollup, lambda uid: JournalMoodRollup.user_id == uid),
+    ("user_tag_counts", UserTagCount, lambda uid: UserTagCount.user_id == uid),
+]
+PHASE_NAMES = [p[0] for p in PHASES]
+
+
+class AccountPurger:
+    def __init__(self, batch_size: Optional[int] = None, pause_seconds: Optional[float] = None,
+                 poll_seconds: Optional[float] = None):
+        self.batch_size = batch_size or settings.PURGE_BATCH_SIZE
+        self.pause_seconds = settings.PURGE_PAUSE_SECONDS if pause_seconds is None else pause_seconds
+        self.poll_seconds = poll_seconds or settings.PURGE_POLL_SECONDS
+        self.rows_deleted = 0
+        self._stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def run(self) -> None:
+        log.info("account purge started (batch=%d, pause=%.2fs)", self.batch_size, self.pause_seconds)
+        while not self._stopping.is_set():
+            try:
+                busy = await self.tick()
+            except Exception:
+                log.exception("account purge tick failed")
+                busy = False
+            try:
+                await asyncio.wait_for(
+                    self._stopping.wait(), timeout=self.pause_seconds if busy else self.poll_seconds
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    async def tick(self) -> bool:
+        """Delete one batch for the oldest open job. True if there was work."""
+        async with SessionLocal() as session:
+            job = (await session.execute(
+                select(AccountDeletion)
+                .where(AccountDeletion.status != "done")
+                .order_by(AccountDeletion.requested_at)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )).scalar_one_or_none()
+            if job is None:
+                return False
+            await self._step(session, job)
+            await session.commit()
+            return True
+
+    async def _step(self, session: AsyncSession, job: AccountDeletion) -> None:
+        if job.phase == "user":
+            index = len(PHASES)
+        else:
+            index = PHASE_NAMES.index(job.phase) if job.phase in PHASE_NAMES else 0
+        if index < len(PHASES):
+            name, model, belongs = PHASES[index]
+            deleted = await self._delete_batch(session, model, belongs(job.user_id))
+            phase = name if deleted == self.batch_size else (PHASE_NAMES[index + 1] if index + 1 < len(PHASES) else "user")
+        else:
+            # Everything below the user is gone, so this cascade has nothing left to do
+            deleted = (await session.execute(
+                delete(User).where(User.user_id == job.user_id).execution_options(synchronize_session=False)
+            )).rowcount
+            phase = "user"
+        done = job.phase == "user"
+        await session.execute(
+            update(AccountDeletion)
+            .where(AccountDeletion.deletion_id == job.deletion_id)
+            .values(
+                status="done" if done else "running",
+                phase=phase,
+                rows_deleted=AccountDeletion.rows_deleted + deleted,
+                updated_at=func.now(),
+                finished_at=func.now() if done else None,
+            )
+        )
+        self.rows_deleted += deleted
+        if done:
+            log.info("account %s purged (deletion %s)", job.user_id, job.deletion_id)
+
+    async def _delete_batch(self, session: AsyncSession, model, belongs) -> int:
+        pk = list(model.__table__.primary_key.columns)
+        batch = select(*pk).where(belongs).limit(self.batch_size)
+        res = await session.execute(
+            delete(model).where(tuple_(*pk).in_(batch)).execution_options(synchronize_session=False)
+        )
+        return res.rowcount
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(levelname)-5.5s [%(name)s] %(message)s")
+    asyncio.run(AccountPurger().run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+# app/accounts.py
+"""
+The one email lookup path.
+
+Emails are stored normalized, lower(trim(email)), as normalize_email()
+returns them (migration 9a40bf65627d normalized the existing rows).
+Lookups compare lower(email) with the normalized input. That is exactly
+the expression the unique ix_users_email_lower index covers, so lookups
+are index scans and case or whitespace variants of an address cannot
+register twice.
+"""
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import User
+
+
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
+
+
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
+    res = await db.execute(select(User).where(func.lower(User.email) == normalize_email(email)))
+    return res.scalar_one_or_none()
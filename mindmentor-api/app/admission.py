@@ -0,0 +1,158 @@
+# app/admission.py
+"""
+Admission control and load shedding.
+
+AdmissionMiddleware caps concurrency per route (ADMISSION_LIMITS, keyed by
+"METHOD /route/template"). Excess requests wait in a bounded queue. When
+the queue is full, or a request waited longer than
+ADMISSION_QUEUE_TIMEOUT_SECONDS, it is shed with 503 + Retry-After instead
+of piling onto the bcrypt pool and the DB pool and dragging every other
+endpoint down with it.
+
+TokenBucket provides per-key rate limits; the auth routes use one keyed
+by client IP and one keyed by email (429 + Retry-After).
+
+All state is per worker process.
+"""
+import asyncio
+import json
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from starlette.routing import Match
+
+from app import metrics
+from app.accounts import normalize_email
+from app.config import settings
+
+admission_shed = metrics.Counter(
+    "mm_admission_shed_total", "Requests rejected by admission control", ("route", "reason")
+)
+rate_limited = metrics.Counter(
+    "mm_rate_limited_total", "Requests rejected by token-bucket rate limits", ("route", "scope")
+)
+
+
+class _RouteGate:
+    __slots__ = ("key", "sem", "waiting")
+
+    def __init__(self, key: str, limit: int):
+        self.key = key
+        self.sem = asyncio.Semaphore(limit)
+        self.waiting = 0
+
+
+class AdmissionMiddleware:
+    def __init__(self, app, limits: Optional[Dict[str, int]] = None,
+                 queue_size: Optional[int] = None, queue_timeout: Optional[float] = None):
+        self.app = app
+        self.limits = settings.ADMISSION_LIMITS if limits is None else limits
+        self.queue_size = settings.ADMISSION_QUEUE_SIZE if queue_size is None else queue_size
+        self.queue_timeout = settings.ADMISSION_QUEUE_TIMEOUT_SECONDS if queue_timeout is None else queue_timeout
+        self._gates: Optional[List[Tuple[object, _RouteGate]]] = None
+
+    def _resolve(self, scope) -> Optional[_RouteGate]:
+        if self._gates is None:
+            # Built on first request, once all routers are included
+            self._gates = []
+            for route in scope["app"].router.routes:
+                for method in getattr(route, "methods", None) or ():
+                    key = f"{method} {route.path}"
+                    if key in self.limits:
+                        self._gates.append((route, _RouteGate(key, self.limits[key])))
+        for route, gate in self._gates:
+            if gate.key.startswith(scope["method"] + " ") and route.matches(scope)[0] == Match.FULL:
+                return gate
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.limits:
+            return await self.app(scope, receive, send)
+        gate = self._resolve(scope)
+        if gate is None:
+            return await self.app(scope, receive, send)
+
+        if gate.sem.locked():
+            if gate.waiting >= self.queue_size:
+                admission_shed.inc(gate.key, "queue_full")
+                return await _reject(send, 503, "Server busy, try again shortly", 1)
+            gate.waiting += 1
+            try:
+                await asyncio.wait_for(gate.sem.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                admission_shed.inc(gate.key, "timeout")
+                return await _reject(send, 503, "Server busy, try again shortly", 1)
+            finally:
+                gate.waiting -= 1
+        else:
+            await gate.sem.acquire()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.sem.release()
+
+
+async def _reject(send, status: int, detail: str, retry_after: int) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(retry_after).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class TokenBucket:
+    """
+    Per-key token buckets; least recently used keys are dropped past max_keys.
+    A rate or burst of 0 disables the limit.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int, max_keys: int = 100_000):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0 and self.burst > 0
+
+    def take(self, key: str) -> float:
+        """Consume a token. Returns 0 if allowed, else seconds until one is available."""
+        if not self.enabled:
+            return 0.0
+        now = time.monotonic()
+        tokens, last = self._buckets.pop(key, (float(self.burst), now))
+        tokens = min(self.burst, tokens + (now - last) * self.rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / self.rate
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+auth_ip_bucket = TokenBucket(settings.AUTH_IP_RATE_PER_MINUTE, settings.AUTH_IP_BURST)
+auth_user_bucket = TokenBucket(settings.AUTH_USER_RATE_PER_MINUTE, settings.AUTH_USER_BURST)
+
+
+def check_auth_rate(request: Request, email: str) -> None:
+    """Apply the per-IP, then per-email, bucket for an auth route; 429 when empty."""
+    route = request.url.path
+    ip = request.client.host if request.client else "unknown"
+    for scope, bucket, key in (("ip", auth_ip_bucket, ip), ("user", auth_user_bucket, normalize_email(email))):
+        wait = bucket.take(key)
+        if wait:
+            rate_limited.inc(route, scope)
+            raise HTTPException(429, "Too many attempts, slow down", headers={"Retry-After": str(math.ceil(wait))})
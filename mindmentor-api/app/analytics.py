@@ -0,0 +1,70 @@
+# app/analytics.py
+"""
+Incremental mood/tag rollups behind GET /journals/stats.
+
+Writers call apply_journal_rollups() in the same transaction as the
+journal insert (sign=+1, after linking tags) or delete (sign=-1, before the
+row is removed), so the stats endpoint never scans app.journals.
+"""
+from typing import Sequence, Union
+
+from sqlalchemy import Date, String, column, func, literal, select, true, values
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.models import Journal, JournalTag, JournalMoodRollup, UserTagCount
+
+GRANULARITIES = ("day", "week", "month")
+
+_granularities = values(column("granularity", String), name="g").data([(g,) for g in GRANULARITIES])
+
+
+async def apply_journal_rollups(
+    db: AsyncSession, user_id: Union[str, Sequence[str]], journal_ids: Sequence[str], sign: int
+) -> None:
+    """
+    Add (sign=1) or subtract (sign=-1) these journals' contribution. Two
+    statements. user_id may be a list when the journals span several users.
+    """
+    if not journal_ids:
+        return
+    user_ids = [user_id] if isinstance(user_id, str) else list(user_id)
+    sign = literal(sign)
+    g = _granularities
+    period = func.date_trunc(g.c.granularity, Journal.created_at).cast(Date)
+
+    mood = (
+        select(
+            Journal.user_id, g.c.granularity, period,
+            sign * func.count(), sign * func.count(Journal.mood), sign * func.coalesce(func.sum(Journal.mood), 0),
+        )
+        .select_from(Journal)
+        .join(g, true())
+        .where(Journal.user_id.in_(user_ids), Journal.journal_id.in_(journal_ids))
+        .group_by(Journal.user_id, g.c.granularity, period)
+        .order_by(Journal.user_id, g.c.granularity, period)  # consistent row-lock order between writers
+    )
+    ins = pg_insert(JournalMoodRollup).from_select(
+        ["user_id", "granularity", "period_start", "entry_count", "mood_count", "mood_sum"], mood
+    )
+    await db.execute(ins.on_conflict_do_update(
+        index_elements=["user_id", "granularity", "period_start"],
+        set_={
+            "entry_count": JournalMoodRollup.entry_count + ins.excluded.entry_count,
+            "mood_count": JournalMoodRollup.mood_count + ins.excluded.mood_count,
+            "mood_sum": JournalMoodRollup.mood_sum + ins.excluded.mood_sum,
+        },
+    ))
+
+    tags = (
+        select(Journal.user_id, JournalTag.c.tag_id, sign * func.count())
+        .select_from(JournalTag.join(Journal, Journal.journal_id == JournalTag.c.journal_id))
+        .where(Journal.user_id.in_(user_ids), JournalTag.c.journal_id.in_(journal_ids))
+        .group_by(Journal.user_id, JournalTag.c.tag_id)
+        .order_by(Journal.user_id, JournalTag.c.tag_id)
+    )
+    ins = pg_insert(UserTagCount).from_select(["user_id", "tag_id", "entry_count"], tags)
+    await db.execute(ins.on_conflict_do_update(
+        index_elements=["user_id", "tag_id"],
+        set_={"entry_count": UserTagCount.entry_count + ins.excluded.entry_count},
+    ))
@@ -0,0 +1,125 @@
+# app/auth_cache.py
+"""
+Bounded in-process TTL/LRU cache of authenticated principals, keyed by
+bearer token, so get_current_user can skip the users SELECT on hot paths.
+
+The cache is per worker process. invalidate_user() clears the local
+worker; broadcast_invalidation() also clears every other worker through the
+app.events NOTIFY listener once the caller's transaction commits. If a
+worker's listener is disconnected, AUTH_CACHE_TTL_SECONDS still bounds how
+stale it can be.
+"""
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Set
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.events import notify, on_event
+from app.models import User
+
+INVALIDATE_EVENT = "principal_invalidated"
+
+
+@dataclass(frozen=True, slots=True)
+class CurrentUser:
+    """Lightweight, session-independent snapshot of the authenticated user."""
+    user_id: str
+    email: str
+    display_name: Optional[str]
+    is_active: bool
+
+    @classmethod
+    def from_user(cls, u: User) -> "CurrentUser":
+        return cls(str(u.user_id), u.email, u.display_name, u.is_active)
+
+
+@dataclass(slots=True)
+class _Entry:
+    claims: dict
+    user: CurrentUser
+    expires_at: float  # time.monotonic()
+
+
+class PrincipalCache:
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._by_user: Dict[str, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, token: str) -> Optional[CurrentUser]:
+        e = self._entries.get(token)
+        if e is None:
+            self.misses += 1
+            return None
+        if e.expires_at <= time.monotonic():
+            self._remove(token)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return e.user
+
+    def put(self, token: str, claims: dict, user: CurrentUser) -> None:
+        # Never outlive the token itself
+        ttl = self.ttl_seconds
+        if "exp" in claims:
+            ttl = min(ttl, float(claims["exp"]) - time.time())
+        if ttl <= 0:
+            return
+        if token in self._entries:
+            self._remove(token)
+        self._entries[token] = _Entry(claims, user, time.monotonic() + ttl)
+        self._by_user.setdefault(user.user_id, set()).add(token)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def invalidate_user(self, user_id: str) -> None:
+        """Drop every cached token of a user (call after updating/deactivating them)."""
+        for token in list(self._by_user.get(str(user_id), ())):
+            self._remove(token)
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._by_user.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    def _remove(self, token: str) -> None:
+        e = self._entries.pop(token, None)
+        if e is None:
+            return
+        tokens = self._by_user.get(e.user.user_id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._by_user[e.user.user_id]
+
+
+principal_cache = PrincipalCache(settings.AUTH_CACHE_MAX_ENTRIES, settings.AUTH_CACHE_TTL_SECONDS)
+
+on_event(INVALIDATE_EVENT, lambda user_id, data: principal_cache.invalidate_user(user_id))
+
+
+async def broadcast_invalidation(db: AsyncSession, user_id: str) -> None:
+    """Invalidate the user's cached principals in every worker when db's transaction commits."""
+    await notify(db, user_id, INVALIDATE_EVENT, {})
@@ -0,0 +1,97 @@
+# app/conditional.py
+"""
+Per-user data versions and conditional GET (If-None-Match -> 304).
+
+users.data_version and users.data_modified_at are bumped in the same
+transaction as every write to the user's journals or profile. Per-user GET
+endpoints derive their validators from them, so a client revalidating an
+unchanged list costs one primary-key lookup and an empty 304 instead of the
+list query and its payload.
+
+Last-Modified is sent for information only; If-Modified-Since is not
+honoured. Its one-second resolution cannot tell apart two writes in the
+same second, and data_modified_at is the writing transaction's start time,
+which need not increase in commit order. The ETag carries the exact version.
+"""
+import hashlib
+from datetime import datetime
+from email.utils import format_datetime
+from typing import Dict, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy import case, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import User
+
+
+async def bump_data_version(db: AsyncSession, user_id: str, n: int = 1) -> int:
+    """Advance the user's data version by n (in the caller's transaction); returns the new value."""
+    res = await db.execute(
+        update(User)
+        .where(User.user_id == user_id)
+        .values(data_version=User.data_version + n, data_modified_at=func.now())
+        .returning(User.data_version)
+    )
+    return res.scalar_one()
+
+
+async def bump_data_versions(db: AsyncSession, counts: Dict[str, int]) -> Dict[str, int]:
+    """
+    bump_data_version for several users in one statement. Rows are locked in
+    user_id order first, so concurrent multi-user writers cannot deadlock.
+    """
+    locked = (
+        select(User.user_id).where(User.user_id.in_(list(counts))).order_by(User.user_id).with_for_update().cte("locked")
+    )
+    n = case(counts, value=User.user_id)
+    res = await db.execute(
+        update(User)
+        .where(User.user_id.in_(select(locked.c.user_id)))
+        .values(data_version=User.data_version + n, data_modified_at=func.now())
+        .returning(User.user_id, User.data_version)
+    )
+    return dict(res.all())
+
+
+async def current_version(db: AsyncSession, user_id: str) -> Tuple[int, datetime]:
+    res = await db.execute(
+        select(User.data_version, User.data_modified_at).where(User.user_id == user_id)
+    )
+    return tuple(res.one())
+
+
+def validators(user_id: str, version: int, modified_at: datetime, *variant) -> Dict[str, str]:
+    """
+    Response headers for a per-user resource. `variant` distinguishes
+    representations at the same version (query params, fieldsets).
+    """
+    digest = hashlib.blake2b(repr((user_id, variant)).encode(), digest_size=8).hexdigest()
+    return {
+        "ETag": f'W/"{version}-{digest}"',
+        "Last-Modified": format_datetime(modified_at, usegmt=True),
+        # Clients may keep a copy but must revalidate it; responses depend on the token
+        "Cache-Control": "private, no-cache",
+        "Vary": "Authorization",
+    }
+
+
+def is_not_modified(request: Request, headers: Dict[str, str]) -> bool:
+    """Weak If-None-Match comparison against our ETag (RFC 9110 13.1.2)."""
+    inm = request.headers.get("if-none-match")
+    if inm is None:
+        return False
+    if inm.strip() == "*":
+        return True
+    ours = _opaque(headers["ETag"])
+    return any(_opaque(tag) == ours for tag in inm.split(","))
+
+
+def not_modified(headers: Dict[str, str]) -> Response:
+    return Response(status_code=304, headers=headers)
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
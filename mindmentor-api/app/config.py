@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings
 from pydantic import AnyUrl
-from typing import Optional
+from typing import Dict, Optional
 
 class Settings(BaseSettings):
     DATABASE_URL: str
@@ -8,6 +8,98 @@ class Settings(BaseSettings):
     APP_PORT: int = 8000
     SECRET_KEY: str = "dev"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
+    # Per-route SQL statement budgets (declared with metrics.query_budget):
+    # "off", "log" (warn when exceeded) or "raise" (fail the request; for tests/dev)
+    QUERY_BUDGET_MODE: str = "off"
+    # Admission control: max concurrent requests per "METHOD /route/template",
+    # how many may wait for a slot, and for how long, before a 503
+    ADMISSION_LIMITS: Dict[str, int] = {
+        "POST /auth/login": 8,
+        "POST /auth/register": 4,
+        "POST /users": 4,
+        "POST /journals/bulk": 2,
+        "GET /journals/export": 4,
+        "GET /journals/search": 16,
+    }
+    ADMISSION_QUEUE_SIZE: int = 32
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 5.0
+    # Token buckets on /auth/login and /auth/register (rate or burst 0 = off)
+    AUTH_IP_RATE_PER_MINUTE: float = 60
+    AUTH_IP_BURST: int = 20
+    AUTH_USER_RATE_PER_MINUTE: float = 10
+    AUTH_USER_BURST: int = 5
+    # Connection pool (per worker process: total = workers * (size + overflow))
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800  # seconds; -1 disables
+    DB_POOL_PRE_PING: bool = True  # one extra round trip per checkout
+    # asyncpg prepared statement cache per connection; 0 for PgBouncer transaction pooling
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # Connections opened per pool at startup, so the first requests on a new
+    # worker skip connection setup (capped at DB_POOL_SIZE; 0 = lazy)
+    DB_WARMUP_CONNECTIONS: int = 2
+    # Optional streaming replica for read-only routes (same pool settings)
+    READ_DATABASE_URL: Optional[str] = None
+    READ_REPLICA_MAX_LAG_SECONDS: float = 5.0
+    READ_REPLICA_CHECK_SECONDS: float = 5.0  # how long a lag/health result is reused
+    READ_REPLICA_CONNECT_TIMEOUT: float = 2.0
+    # After a write, that user's reads stay on the primary for this long
+    READ_YOUR_WRITES_SECONDS: float = 5.0
+    # POST /journals/bulk: max entries per request, rows per INSERT batch
+    BULK_IMPORT_MAX_ENTRIES: int = 5000
+    BULK_IMPORT_BATCH_SIZE: int = 500
+    # GET /journals keyset paging: the first page looks only this many days
+    # back (recent monthly partitions), falling back to the full history if
+    # that does not fill the page (0 = always the full history)
+    JOURNAL_FIRST_PAGE_WINDOW_DAYS: int = 62
+    # GET /journals/export: rows fetched per server-side cursor round trip
+    EXPORT_FETCH_SIZE: int = 500
+    # bcrypt worker pool: threads, and how many calls may wait for one before
+    # new ones are rejected with 503 (0 = fail fast when all workers are busy)
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 32
+    # GET /sessions/events (SSE): per-connection send queue, keep-alive interval,
+    # and max concurrent streams per user
+    EVENTS_QUEUE_SIZE: int = 100
+    EVENTS_HEARTBEAT_SECONDS: float = 25.0
+    EVENTS_MAX_CONNECTIONS_PER_USER: int = 5
+    # Reminder dispatcher (python -m app.reminders): rows claimed per batch,
+    # max sleep between polls, and cached cron/timezone evaluations
+    REMINDER_BATCH_SIZE: int = 500
+    REMINDER_POLL_SECONDS: float = 1.0
+    REMINDER_CRON_CACHE_SIZE: int = 4096
+    # Group commit for POST /journals: coalesce concurrent creates for up to
+    # this many milliseconds into one INSERT + COMMIT (0 = off)
+    JOURNAL_GROUP_COMMIT_MS: float = 0
+    JOURNAL_GROUP_COMMIT_MAX_BATCH: int = 200
+    # Account purge worker (python -m app.account_purge): rows deleted per
+    # transaction, pause between batches, and idle poll interval
+    PURGE_BATCH_SIZE: int = 1000
+    PURGE_PAUSE_SECONDS: float = 0.2
+    PURGE_POLL_SECONDS: float = 5.0
+    # Run the reminder dispatcher / account purge inside each API worker's
+    # event loop instead of as separate processes
+    RUN_REMINDER_DISPATCHER: bool = False
+    RUN_ACCOUNT_PURGE: bool = False
+    # Partition maintenance (python -m app.partitions): monthly partitions of
+    # journals/messages created this many months ahead; partitions older than
+    # the retention are detached into PARTITION_ARCHIVE_SCHEMA (0 = keep all)
+    PARTITION_MONTHS_AHEAD: int = 3
+    JOURNAL_RETENTION_MONTHS: int = 0
+    MESSAGE_RETENTION_MONTHS: int = 0
+    PARTITION_ARCHIVE_SCHEMA: str = "archive"
+    # Each API worker runs that maintenance this often (an advisory lock
+    # keeps concurrent runs from overlapping); off if scheduled externally
+    RUN_PARTITION_MAINTENANCE: bool = True
+    PARTITION_MAINTENANCE_INTERVAL_SECONDS: float = 6 * 3600
+    # GET /journals/{id}/related: per-process cache of users' vector matrices
+    SIMILARITY_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    # In-process tag name -> tag_id cache (create_journal, /tags/suggest)
+    TAG_CACHE_MAX_ENTRIES: int = 50000
+    # get_current_user principal cache (per process); TTL 0 disables it
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_CACHE_TTL_SECONDS: int = 60
 
     class Config:
         env_file = ".env"
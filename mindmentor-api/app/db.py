@@ -1,16 +1,267 @@
 # app/db.py
-from typing import AsyncGenerator
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, Dict, Optional
+from sqlalchemy import event, exc, text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.config import settings
+from app import metrics
+
+log = logging.getLogger("mindmentor.db")
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Default async pool, plus checkout counts and wait-time metrics."""
+
+    wait_max = 0.0
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            conn = super().connect()
+        except exc.TimeoutError:
+            metrics.db_pool_timeouts.inc()
+            raise
+        waited = time.perf_counter() - start
+        self.wait_max = max(self.wait_max, waited)
+        metrics.db_pool_wait_seconds.observe(waited)
+        metrics.db_pool_checkouts.inc()
+        return conn
+
+
+def _create_engine(url: str, **connect_args):
+    return create_async_engine(
+        url,
+        poolclass=TimedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={
+            # asyncpg's own cache, and SQLAlchemy's prepared statement cache on top of it
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            **connect_args,
+        },
+    )
+
+
+def _instrument(sync_engine) -> None:
+    """Per-statement timing; metrics attributes it to the current request."""
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        # Housekeeping statements (replica lag probe) don't count against budgets
+        if not context.execution_options.get("internal"):
+            metrics.record_query(elapsed)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _handle_error(ctx):
+        # after_cursor_execute does not fire for failed statements
+        starts = ctx.connection.info.get("query_start") if ctx.connection is not None else None
+        if starts:
+            metrics.record_query(time.perf_counter() - starts.pop())
+
 
 # Use async engine for the app runtime
-engine = create_async_engine(settings.DATABASE_URL, pool_pre_ping=True)
+engine = _create_engine(settings.DATABASE_URL)
 SessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+_instrument(engine.sync_engine)
+
+# Optional read replica; its pool is separate and not in the pool gauges below
+read_engine = (
+    _create_engine(settings.READ_DATABASE_URL, timeout=settings.READ_REPLICA_CONNECT_TIMEOUT)
+    if settings.READ_DATABASE_URL else None
+)
+ReadSessionLocal = (
+    async_sessionmaker(read_engine, expire_on_commit=False, class_=AsyncSession)
+    if read_engine is not None else None
+)
+if read_engine is not None:
+    _instrument(read_engine.sync_engine)
+
+_pool = engine.sync_engine.pool
+metrics.register_gauge("mm_db_pool_size", "Configured pool size", _pool.size)
+metrics.register_gauge("mm_db_pool_checked_out", "Connections currently checked out", _pool.checkedout)
+metrics.register_gauge("mm_db_pool_overflow", "Connections open beyond pool_size", lambda: max(_pool.overflow(), 0))
+
+
+def pool_stats() -> dict:
+    """Live pool state for /health/db."""
+    n, waited = metrics.db_pool_wait_seconds.count_and_sum()
+    return {
+        "size": _pool.size(),
+        "checked_out": _pool.checkedout(),
+        "checked_in": _pool.checkedin(),
+        "overflow": max(_pool.overflow(), 0),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "checkouts": int(metrics.db_pool_checkouts.value()),
+        "timeouts": int(metrics.db_pool_timeouts.value()),
+        "wait_avg_ms": round(waited / n * 1000, 3) if n else 0.0,
+        "wait_max_ms": round(_pool.wait_max * 1000, 3),
+    }
+
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """FastAPI dependency: yields an AsyncSession per request."""
     async with SessionLocal() as session:
         yield session
 
+
+read_sessions = metrics.Counter(
+    "mm_db_read_sessions_total", "Read-only sessions by where they were routed", ("target",)
+)
+
+# Replay lag in seconds; 0 when the replica has applied everything it
+# received (pg_last_xact_replay_timestamp alone grows on an idle primary)
+_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class _ReplicaState:
+    """Last replica health check, reused for READ_REPLICA_CHECK_SECONDS."""
+
+    def __init__(self):
+        self.checked_at = float("-inf")
+        self.healthy = True
+        self.lag: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def stale(self) -> bool:
+        return time.monotonic() - self.checked_at >= settings.READ_REPLICA_CHECK_SECONDS
+
+    def mark(self, healthy: bool, lag: Optional[float] = None, error: Optional[str] = None) -> None:
+        self.checked_at = time.monotonic()
+        self.healthy, self.lag, self.error = healthy, lag, error
+
+
+_replica = _ReplicaState()
+
+# user_id -> monotonic time of that user's last committed write (this process)
+_recent_writes: Dict[str, float] = {}
+_RECENT_WRITES_MAX = 50_000
+
+
+def note_write(user_id) -> None:
+    """Pin the user's reads to the primary for READ_YOUR_WRITES_SECONDS."""
+    if read_engine is None:
+        return
+    now = time.monotonic()
+    if len(_recent_writes) >= _RECENT_WRITES_MAX:
+        horizon = now - settings.READ_YOUR_WRITES_SECONDS
+        for uid in [u for u, t in _recent_writes.items() if t < horizon]:
+            del _recent_writes[uid]
+    _recent_writes[str(user_id)] = now
+
+
+def _pinned(user_id) -> bool:
+    if user_id is None:
+        return False
+    wrote = _recent_writes.get(str(user_id))
+    return wrote is not None and time.monotonic() - wrote < settings.READ_YOUR_WRITES_SECONDS
+
+
+async def _open_replica() -> Optional[AsyncSession]:
+    """A replica session with its connection checked out, or None to use the primary."""
+    if not _replica.healthy and not _replica.stale():
+        return None
+    session = ReadSessionLocal()
+    try:
+        conn = await session.connection()
+        if _replica.stale():
+            lag = (await conn.execute(_LAG_SQL, execution_options={"internal": True})).scalar()
+            _replica.mark(float(lag) <= settings.READ_REPLICA_MAX_LAG_SECONDS, lag=float(lag))
+    except (exc.DBAPIError, exc.TimeoutError, OSError) as e:
+        _replica.mark(False, error=type(e).__name__)
+        await session.close()
+        return None
+    if not _replica.healthy:
+        await session.close()
+        return None
+    return session
+
+
+@asynccontextmanager
+async def read_session(user_id=None) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Session for read-only work: the replica when configured, reachable and
+    within READ_REPLICA_MAX_LAG_SECONDS, else the primary. Users who wrote
+    in the last READ_YOUR_WRITES_SECONDS (per process) stay on the primary.
+    """
+    session = None
+    if read_engine is not None and not _pinned(user_id):
+        session = await _open_replica()
+    if session is None:
+        target = "primary" if read_engine is None else "pinned" if _pinned(user_id) else "fallback"
+        session = SessionLocal()
+    else:
+        target = "replica"
+    read_sessions.inc(target)
+    async with session:
+        yield session
+
+
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """FastAPI dependency for read-only routes that are not user-scoped."""
+    async with read_session() as session:
+        yield session
+
+
+def replica_stats() -> Optional[dict]:
+    """Replica routing state for /health/db (None when no replica is configured)."""
+    if read_engine is None:
+        return None
+    return {
+        "healthy": _replica.healthy,
+        "lag_seconds": _replica.lag,
+        "error": _replica.error,
+        "pinned_users": sum(1 for u in list(_recent_writes) if _pinned(u)),
+    }
+
+
+async def warm_pool(n: Optional[int] = None) -> int:
+    """
+    Open up to n connections per engine (at most DB_POOL_SIZE, which stay
+    pooled) so the first requests skip connect, auth and dialect setup.
+    Returns how many were opened; failures are logged, not raised.
+    """
+    n = min(settings.DB_WARMUP_CONNECTIONS if n is None else n, settings.DB_POOL_SIZE)
+    opened = 0
+    for eng in (engine, read_engine):
+        if eng is None or n <= 0:
+            continue
+        # Held open together, otherwise the pool would hand back the same one
+        conns = await asyncio.gather(*(eng.connect() for _ in range(n)), return_exceptions=True)
+        for conn in conns:
+            if isinstance(conn, BaseException):
+                log.warning("pool warm-up connect to %s failed: %s", eng.url.host, conn)
+                continue
+            try:
+                await conn.execute(text("SELECT 1").execution_options(internal=True))
+                opened += 1
+            except Exception as e:
+                log.warning("pool warm-up query on %s failed: %s", eng.url.host, e)
+            finally:
+                await conn.close()
+    return opened
+
+
+async def dispose_engines() -> None:
+    """Close every pooled connection (shutdown)."""
+    await engine.dispose()
+    if read_engine is not None:
+        await read_engine.dispose()
+
+
 # Back-compat (if some files already import get_session)
 get_session = get_db
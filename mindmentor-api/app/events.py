@@ -0,0 +1,186 @@
+# app/events.py
+"""
+Pub/sub for server push (GET /sessions/events).
+
+Each open stream owns a small bounded asyncio.Queue, so an idle connection
+costs one queue and one suspended coroutine. publish() never blocks: if a
+slow client's queue is full, that subscription is marked overflowed and
+the stream ends with a "resync" event, and the client refetches history
+through the cursor endpoint. A slow reader can never make the publisher
+wait or grow memory without bound.
+
+Events cross worker processes through Postgres LISTEN/NOTIFY. Writers call
+notify() inside their transaction, so an event goes out only if the write
+commits. Every API worker runs an EventListener on its own connection,
+which hands each notification to its local broker.publish(). A payload
+over the NOTIFY size limit, or a listener reconnect (notifications may
+have been missed), turns into a `resync` for the affected streams.
+"""
+import asyncio
+import json
+import logging
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+import asyncpg
+from sqlalchemy import ARRAY, Text, cast, func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+
+log = logging.getLogger("mindmentor.events")
+
+CHANNEL = "mm_events"
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+MAX_PAYLOAD_BYTES = 7999
+
+# Internal events (cache invalidation, ...): run in every worker, never streamed
+_handlers: Dict[str, Callable[[str, dict], None]] = {}
+
+
+def on_event(event: str, handler: Callable[[str, dict], None]) -> None:
+    """Call handler(user_id, data) in every worker for `event` instead of pushing it to streams."""
+    _handlers[event] = handler
+
+
+class Subscription:
+    __slots__ = ("user_id", "queue", "overflowed")
+
+    def __init__(self, user_id: str, maxsize: int):
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+
+class EventBroker:
+    def __init__(self, queue_size: int, max_per_user: int):
+        self.queue_size = queue_size
+        self.max_per_user = max_per_user
+        self._subs: Dict[str, Set[Subscription]] = {}
+        self.published = 0
+        self.dropped = 0
+
+    def can_subscribe(self, user_id: str) -> bool:
+        return len(self._subs.get(user_id, ())) < self.max_per_user
+
+    def subscribe(self, user_id: str) -> Optional[Subscription]:
+        """Returns None when the user already has max_per_user open streams."""
+        subs = self._subs.setdefault(user_id, set())
+        if len(subs) >= self.max_per_user:
+            return None
+        sub = Subscription(user_id, self.queue_size)
+        subs.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        subs = self._subs.get(sub.user_id)
+        if subs is not None:
+            subs.discard(sub)
+            if not subs:
+                del self._subs[sub.user_id]
+
+    def publish(self, user_id: str, event: str, data: dict) -> None:
+        for sub in self._subs.get(user_id, ()):
+            if sub.overflowed:
+                continue
+            try:
+                sub.queue.put_nowait((event, data))
+                self.published += 1
+            except asyncio.QueueFull:
+                sub.overflowed = True
+                self.dropped += 1
+
+    def resync_all(self) -> None:
+        """End every local stream with `resync` (events may have been missed)."""
+        for subs in self._subs.values():
+            for sub in subs:
+                sub.overflowed = True
+                try:
+                    sub.queue.put_nowait(("resync", {}))  # wakes an idle stream
+                except asyncio.QueueFull:
+                    pass
+
+    def connections(self) -> int:
+        return sum(len(s) for s in self._subs.values())
+
+
+broker = EventBroker(settings.EVENTS_QUEUE_SIZE, settings.EVENTS_MAX_CONNECTIONS_PER_USER)
+
+
+def _payload(user_id: str, event: str, data: dict) -> str:
+    payload = json.dumps({"u": str(user_id), "e": event, "d": data}, separators=(",", ":"), default=str)
+    if len(payload.encode()) > MAX_PAYLOAD_BYTES:
+        # The client reloads through the history endpoints on resync
+        payload = json.dumps({"u": str(user_id), "e": "resync", "d": {}})
+    return payload
+
+
+async def notify_many(db: AsyncSession, events: Iterable[Tuple[str, str, dict]]) -> None:
+    """
+    Queue (user_id, event, data) for every worker's streams in one statement.
+    Sent when the caller's transaction commits, dropped if it rolls back.
+    """
+    payloads = [_payload(*e) for e in events]
+    if payloads:
+        p = func.unnest(cast(payloads, ARRAY(Text))).table_valued("payload")
+        await db.execute(select(func.pg_notify(CHANNEL, p.c.payload)).select_from(p))
+
+
+async def notify(db: AsyncSession, user_id: str, event: str, data: dict) -> None:
+    await notify_many(db, [(user_id, event, data)])
+
+
+class EventListener:
+    """LISTENs on CHANNEL on a dedicated connection and feeds broker; reconnects on loss."""
+
+    def __init__(self, retry_seconds: float = 1.0):
+        self.retry_seconds = retry_seconds
+        self._stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def run(self) -> None:
+        dsn = make_url(settings.DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+        connected_before = False
+        while not self._stopping.is_set():
+            lost = asyncio.Event()
+            try:
+                conn = await asyncpg.connect(dsn)
+            except Exception as e:
+                log.warning("event listener connect failed: %s", e)
+            else:
+                try:
+                    conn.add_termination_listener(lambda _: lost.set())
+                    await conn.add_listener(CHANNEL, self._on_notify)
+                    if connected_before:
+                        broker.resync_all()
+                    connected_before = True
+                    waits = [asyncio.ensure_future(self._stopping.wait()), asyncio.ensure_future(lost.wait())]
+                    await asyncio.wait(waits, return_when=asyncio.FIRST_COMPLETED)
+                    for w in waits:
+                        w.cancel()
+                except Exception as e:
+                    log.warning("event listener failed: %s", e)
+                finally:
+                    if not conn.is_closed():
+                        await conn.close()
+                if self._stopping.is_set():
+                    return
+                log.warning("event listener connection lost; reconnecting")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.retry_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def _on_notify(self, conn, pid, channel, payload) -> None:
+        try:
+            msg = json.loads(payload)
+        except ValueError:
+            log.warning("ignoring malformed event payload")
+            return
+        handler = _handlers.get(msg["e"])
+        if handler is not None:
+            handler(msg["u"], msg["d"])
+        else:
+            broker.publish(msg["u"], msg["e"], msg["d"])
@@ -0,0 +1,117 @@
+# app/journal_batcher.py
+"""
+Group commit for create_journal.
+
+With JOURNAL_GROUP_COMMIT_MS > 0, concurrent create_journal calls in this
+process are collected for up to that many milliseconds (or until
+JOURNAL_GROUP_COMMIT_MAX_BATCH entries) and written by
+insert_journals_for_users(): one multi-row INSERT and one COMMIT, so one
+WAL flush, for the whole batch instead of one per request. Every caller
+still awaits its own journal_id.
+
+If the batch transaction fails, its entries are retried one transaction
+each, so only the caller whose entry is at fault sees the error. The
+trade-off is up to JOURNAL_GROUP_COMMIT_MS of added latency per create.
+"""
+import asyncio
+import contextvars
+import logging
+from typing import List, Optional, Set, Tuple
+
+from app import metrics
+from app.config import settings
+from app.db import SessionLocal
+from app.journal_writes import insert_journals, insert_journals_for_users
+from app.schemas import JournalCreate
+
+log = logging.getLogger("mindmentor.journal_batcher")
+
+batch_size = metrics.Histogram(
+    "mm_journal_group_commit_size", "Journals written per group commit", (), metrics.COUNT_BUCKETS
+)
+batch_fallbacks = metrics.Counter(
+    "mm_journal_group_commit_fallbacks_total", "Group commits that failed and were retried per entry"
+)
+
+_Pending = Tuple[str, JournalCreate, asyncio.Future]
+
+
+class JournalBatcher:
+    def __init__(self, window_ms: float, max_batch: int):
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._pending: List[_Pending] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushing: Set[asyncio.Task] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+
+    async def submit(self, user_id: str, entry: JournalCreate) -> str:
+        """Queue one journal for the next group commit; returns its journal_id once committed."""
+        fut = asyncio.get_running_loop().create_future()
+        self._pending.append((user_id, entry, fut))
+        if len(self._pending) >= self.max_batch:
+            self._flush_now()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush_now)
+        return await fut
+
+    def _flush_now(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        # Fresh context: the batch's queries belong to no single request's budget
+        task = asyncio.get_running_loop().create_task(self._write(batch), context=contextvars.Context())
+        self._flushing.add(task)
+        task.add_done_callback(self._flushing.discard)
+
+    async def drain(self) -> None:
+        """Write whatever is queued and wait for in-flight batches (shutdown)."""
+        self._flush_now()
+        if self._flushing:
+            await asyncio.gather(*self._flushing, return_exceptions=True)
+
+    async def _write(self, batch: List[_Pending]) -> None:
+        live = [p for p in batch if not p[2].done()]  # skip callers that were cancelled
+        if not live:
+            return
+        by_user = {}
+        for user_id, entry, _ in live:
+            by_user.setdefault(user_id, []).append(entry)
+        try:
+            async with SessionLocal() as db:
+                ids = await insert_journals_for_users(db, by_user)
+                await db.commit()
+        except Exception:
+            log.warning("group commit of %d journals failed; retrying individually", len(live), exc_info=True)
+            batch_fallbacks.inc()
+            await self._write_each(live)
+            return
+        batch_size.observe(len(live))
+        # insert_journals_for_users returns each user's ids in submission order
+        cursors = {user_id: iter(user_ids) for user_id, user_ids in ids.items()}
+        for user_id, _, fut in live:
+            journal_id = next(cursors[user_id])
+            if not fut.done():
+                fut.set_result(journal_id)
+
+    async def _write_each(self, batch: List[_Pending]) -> None:
+        for user_id, entry, fut in batch:
+            try:
+                async with SessionLocal() as db:
+                    (journal_id,) = await insert_journals(db, user_id, [entry])
+                    await db.commit()
+            except Exception as e:
+                if not fut.done():
+                    fut.set_exception(e)
+            else:
+                if not fut.done():
+                    fut.set_result(journal_id)
+
+
+journal_batcher = JournalBatcher(settings.JOURNAL_GROUP_COMMIT_MS, settings.JOURNAL_GROUP_COMMIT_MAX_BATCH)
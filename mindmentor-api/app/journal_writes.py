@@ -0,0 +1,162 @@
+# app/journal_writes.py
+"""
+Set-based write helpers shared by the journal endpoints.
+
+Everything here issues a fixed number of statements per call, no matter
+how many journals or tags are involved, except that a statement which
+would exceed the driver's bind-parameter limit is split into chunks.
+"""
+from datetime import timezone
+from typing import Dict, Iterable, Iterator, List, Sequence
+from uuid import uuid4
+
+from sqlalchemy import false, func, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.analytics import apply_journal_rollups
+from app.conditional import bump_data_version, bump_data_versions
+from app.models import Journal, Tag, JournalTag
+from app.schemas import JournalCreate
+from app.similarity import embed
+from app.tag_cache import tag_catalog
+
+# asyncpg (the Postgres protocol) allows at most 32767 bind parameters per statement
+MAX_BIND_PARAMS = 32767
+
+
+def _chunks(items: Sequence, params_per_item: int) -> Iterator[Sequence]:
+    size = MAX_BIND_PARAMS // params_per_item
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def normalize_tag_names(raw: Iterable[str] | None) -> List[str]:
+    """Lowercase, strip and de-duplicate tag names, keeping first-seen order."""
+    seen: Dict[str, None] = {}
+    for r in raw or []:
+        name = (r or "").strip().lower()
+        if name:
+            seen.setdefault(name, None)
+    return list(seen)
+
+
+async def upsert_tags(db: AsyncSession, names: Sequence[str]) -> Dict[str, int]:
+    """
+    Resolve tag names to tag_ids, creating missing tags. Names found in the
+    in-process tag catalog cost nothing; the rest take one statement:
+    INSERT ... ON CONFLICT DO NOTHING RETURNING, unioned with a SELECT of the
+    tags that already existed. DO NOTHING (rather than DO UPDATE) keeps popular
+    tags like "daily" from being row-locked by every concurrent writer.
+    """
+    cached, names = tag_catalog.lookup(set(names))
+    names.sort()  # stable order avoids insert deadlocks between writers
+    if not names:
+        return cached
+    ids, inserted = {}, set()
+    # Each name is bound twice: in the VALUES list and in the IN list
+    for chunk in _chunks(names, 2):
+        ins = (
+            pg_insert(Tag)
+            .values([{"name": n} for n in chunk])
+            .on_conflict_do_nothing(index_elements=["name"])
+            .returning(Tag.tag_id, Tag.name)
+            .cte("ins")
+        )
+        stmt = select(ins.c.tag_id, ins.c.name, true().label("new")).union_all(
+            select(Tag.tag_id, Tag.name, false()).where(Tag.name.in_(chunk))
+        )
+        for tag_id, name, new in (await db.execute(stmt)).all():
+            ids[name] = tag_id
+            if new:
+                inserted.add(name)
+
+    # A tag committed by a concurrent transaction after our snapshot was taken
+    # is skipped by DO NOTHING but invisible to the SELECT; pick it up here.
+    missing = [n for n in names if n not in ids]
+    for chunk in _chunks(missing, 1):
+        res = await db.execute(select(Tag.tag_id, Tag.name).where(Tag.name.in_(chunk)))
+        ids.update({name: tag_id for tag_id, name in res.all()})
+    # Tags inserted by this transaction are not cached until seen committed;
+    # a rollback would otherwise leave a dangling tag_id in the catalog
+    tag_catalog.add({n: i for n, i in ids.items() if n not in inserted})
+    ids.update(cached)
+    return ids
+
+
+async def link_tags(db: AsyncSession, journal_tags: Dict[str, List[str]]) -> None:
+    """
+    Link journals to tags by name ({journal_id: [tag names]}) in at most three
+    statements, more only when the rows exceed the bind-parameter limit.
+    """
+    tag_ids = await upsert_tags(db, [n for names in journal_tags.values() for n in names])
+    rows = [
+        {"journal_id": jid, "tag_id": tag_ids[name]}
+        for jid, names in journal_tags.items()
+        for name in names
+    ]
+    for chunk in _chunks(rows, 2):
+        await db.execute(
+            pg_insert(JournalTag)
+            .values(chunk)
+            .on_conflict_do_nothing(index_elements=["journal_id", "tag_id"])
+        )
+
+
+async def insert_journals(db: AsyncSession, user_id: str, entries: Sequence[JournalCreate]) -> List[str]:
+    """
+    Insert journals (and their tags) for one user with a multi-row INSERT.
+    journal_ids are generated here so no RETURNING round trip or ordering
+    guarantee is needed. Entries may carry an optional created_at (imports).
+    Bumps the user's data version by len(entries) and stamps each row with
+    its own change_seq (for /sync). Also updates the analytics rollups.
+    Does not commit.
+    """
+    if not entries:
+        return []
+    return (await insert_journals_for_users(db, {user_id: entries}))[user_id]
+
+
+async def insert_journals_for_users(
+    db: AsyncSession, entries_by_user: Dict[str, Sequence[JournalCreate]]
+) -> Dict[str, List[str]]:
+    """
+    insert_journals for several users at once (group commit): the same
+    statements, each covering every user. Does not commit.
+    """
+    entries_by_user = {uid: entries for uid, entries in entries_by_user.items() if entries}
+    if not entries_by_user:
+        return {}
+    if len(entries_by_user) == 1:
+        ((uid, entries),) = entries_by_user.items()
+        versions = {uid: await bump_data_version(db, uid, len(entries))}
+    else:
+        versions = await bump_data_versions(db, {uid: len(e) for uid, e in entries_by_user.items()})
+
+    rows, journal_tags, ids_by_user = [], {}, {}
+    for uid, entries in entries_by_user.items():
+        seq = versions[uid] - len(entries)
+        ids = ids_by_user[uid] = []
+        for e in entries:
+            seq += 1
+            jid = str(uuid4())
+            created_at = getattr(e, "created_at", None)
+            if created_at is not None and created_at.tzinfo is not None:
+                created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+            rows.append({
+                "journal_id": jid,
+                "user_id": uid,
+                "content": e.content,
+                "mood": e.mood,
+                "created_at": created_at if created_at is not None else func.now(),
+                "change_seq": seq,
+            })
+            journal_tags[jid] = tags = normalize_tag_names(e.tags)
+            rows[-1]["content_vec"] = embed(e.content, tags)
+            ids.append(jid)
+
+    for chunk in _chunks(rows, len(rows[0])):
+        await db.execute(pg_insert(Journal).values(chunk))
+    await link_tags(db, journal_tags)
+    await apply_journal_rollups(db, list(ids_by_user), [r["journal_id"] for r in rows], 1)
+    return ids_by_user
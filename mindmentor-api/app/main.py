@@ -1,31 +1,113 @@
-from fastapi import FastAPI
-from .routers import users, journals, health, auth
-from fastapi.middleware.cors import CORSMiddleware
+import time
+
+_IMPORT_STARTED = time.perf_counter()  # before the imports below, which are most of a cold start
 
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from .routers import users, journals, health, auth, metrics, sessions, sync, tags
+from .admission import AdmissionMiddleware
+from .config import settings
+from .db import dispose_engines, warm_pool
+from .events import EventListener
+from .journal_batcher import journal_batcher
+from .metrics import MetricsMiddleware, register_gauge
+from .security import PasswordHasherBusy, warm_up as warm_up_security
+from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI(title="MindMentor API", version="0.1.0")
+log = logging.getLogger("mindmentor.main")
 
-origins = [
-    "http://localhost:5173",   # Vite dev server
-    "http://localhost:3000",   # (optional)
-]
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],          # allow all during dev
-    allow_credentials=False,      # must be False when allow_origins=["*"]
-    allow_methods=["*"],
-    allow_headers=["*"],
-    max_age=86400,  
+_startup = {"seconds": 0.0}
+register_gauge(
+    "mm_startup_seconds", "Seconds from importing app.main until the worker was ready to serve",
+    lambda: _startup["seconds"],
 )
 
-# Routers
-app.include_router(health.router)
-app.include_router(users.router)
-app.include_router(journals.router)
-app.include_router(auth.router)
+
+def _background_workers():
+    """In-process workers; each has run() and stop()."""
+    # Feeds this worker's SSE streams from every process's notify()
+    workers = [EventListener()]
+    if settings.RUN_REMINDER_DISPATCHER:
+        from .reminders import ReminderDispatcher
+        workers.append(ReminderDispatcher())
+    if settings.RUN_ACCOUNT_PURGE:
+        from .account_purge import AccountPurger
+        workers.append(AccountPurger())
+    if settings.RUN_PARTITION_MAINTENANCE:
+        from .partitions import PartitionMaintainer
+        workers.append(PartitionMaintainer())
+    return workers
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Connections and crypto setup in parallel: neither needs the other
+    opened, _ = await asyncio.gather(warm_pool(), warm_up_security())
+    workers = _background_workers()
+    tasks = [asyncio.create_task(w.run()) for w in workers]
+    _startup["seconds"] = time.perf_counter() - _IMPORT_STARTED
+    log.info("ready in %.3fs (%d pooled connections opened)", _startup["seconds"], opened)
+    try:
+        yield
+    finally:
+        for w in workers:
+            w.stop()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # Queued group-commit entries still have callers waiting on them
+        await journal_batcher.drain()
+        await dispose_engines()
+
+
+async def password_hasher_busy(request: Request, exc: PasswordHasherBusy):
+    return JSONResponse(
+        {"detail": "Server busy, try again shortly"},
+        status_code=503,
+        headers={"Retry-After": "1"},
+    )
 
 
-@app.get("/")
 async def root():
     return {"name": "MindMentor API", "ok": True}
+
+
+def create_app() -> FastAPI:
+    """Build the ASGI app; `uvicorn --factory app.main:create_app` or the module-level `app`."""
+    app = FastAPI(title="MindMentor API", version="0.1.0", lifespan=lifespan)
+
+    origins = [
+        "http://localhost:5173",   # Vite dev server
+        "http://localhost:3000",   # (optional)
+    ]
+    # Innermost of the three: shed responses still get CORS headers and metrics
+    app.add_middleware(AdmissionMiddleware)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],          # allow all during dev
+        allow_credentials=False,      # must be False when allow_origins=["*"]
+        allow_methods=["*"],
+        allow_headers=["*"],
+        max_age=86400,
+    )
+    # Outermost, so latency covers every other middleware
+    app.add_middleware(MetricsMiddleware)
+
+    # Routers
+    app.include_router(health.router)
+    app.include_router(users.router)
+    app.include_router(journals.router)
+    app.include_router(sessions.router)
+    app.include_router(sync.router)
+    app.include_router(tags.router)
+    app.include_router(auth.router)
+    app.include_router(metrics.router)
+
+    app.add_exception_handler(PasswordHasherBusy, password_hasher_busy)
+    app.get("/")(root)
+    return app
+
+
+app = create_app()
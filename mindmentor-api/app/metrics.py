@@ -0,0 +1,234 @@
+# app/metrics.py
+"""
+Minimal in-process metrics with Prometheus text exposition (GET /metrics).
+
+- MetricsMiddleware records per-route latency and, through a contextvar,
+  how many SQL statements each request ran and how long they took.
+- app.db feeds query timings (record_query) and pool checkout waits.
+- Other modules add point-in-time gauges with register_gauge(), and
+  counters they already keep (monotonic totals, *_total) with
+  register_counter(), so rate()/increase() handle worker restarts.
+- Routes may declare a SQL statement budget with query_budget(n); see
+  QUERY_BUDGET_MODE.
+
+Everything is per worker process; Prometheus aggregates across workers.
+"""
+import logging
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import Depends
+
+from app.config import settings
+
+log = logging.getLogger("mindmentor.metrics")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        _registry.append(self)
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for lv, v in self._values.items():
+            lines.append(f"{self.name}{_labels(self.labels, lv)} {_num(v)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts..., +Inf count], sum
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        _registry.append(self)
+
+    def observe(self, value: float, *label_values: str) -> None:
+        counts, total = self._values.get(label_values) or self._values.setdefault(
+            label_values, ([0] * (len(self.buckets) + 1), [0.0])
+        )
+        counts[bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def count_and_sum(self, *label_values: str) -> Tuple[int, float]:
+        counts, total = self._values.get(label_values, ([0], [0.0]))
+        return sum(counts), total[0]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for lv, (counts, total) in self._values.items():
+            cumulative = 0
+            for le, c in zip(self.buckets + (float("inf"),), counts):
+                cumulative += c
+                labels = _labels(self.labels + ("le",), lv + ("+Inf" if le == float("inf") else _num(le),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, lv)} {_num(total[0])}")
+            lines.append(f"{self.name}_count{_labels(self.labels, lv)} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """Read at scrape time from a callback returning a number or {label value: number}."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, fn: Callable, label: Optional[str] = None):
+        self.name, self.help, self.fn, self.label = name, help, fn, label
+        _registry.append(self)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        value = self.fn()
+        if isinstance(value, dict):
+            for lv, v in value.items():
+                lines.append(f"{self.name}{_labels((self.label,), (lv,))} {_num(v)}")
+        else:
+            lines.append(f"{self.name} {_num(value)}")
+        return lines
+
+
+class CallbackCounter(Gauge):
+    """Like Gauge, for a callback returning a value that only ever increases."""
+
+    kind = "counter"
+
+
+_registry: list = []
+
+
+def register_gauge(name: str, help: str, fn: Callable, label: Optional[str] = None) -> Gauge:
+    return Gauge(name, help, fn, label)
+
+
+def register_counter(name: str, help: str, fn: Callable, label: Optional[str] = None) -> CallbackCounter:
+    return CallbackCounter(name, help, fn, label)
+
+
+def render() -> str:
+    lines: List[str] = []
+    for m in _registry:
+        lines += m.render()
+    return "\n".join(lines) + "\n"
+
+
+def _num(v: float) -> str:
+    return repr(float(v)) if not float(v).is_integer() else str(int(v))
+
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    esc = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, esc)) + "}"
+
+
+# ---------- Metrics ----------
+http_request_seconds = Histogram(
+    "mm_http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status")
+)
+db_queries_per_request = Histogram(
+    "mm_db_queries_per_request", "SQL statements executed per HTTP request", ("route",), COUNT_BUCKETS
+)
+db_query_seconds_per_request = Histogram(
+    "mm_db_query_seconds_per_request", "Total SQL time per HTTP request", ("route",)
+)
+db_query_seconds = Histogram("mm_db_query_duration_seconds", "Duration of individual SQL statements")
+db_pool_checkouts = Counter("mm_db_pool_checkouts_total", "Connections checked out of the pool")
+db_pool_timeouts = Counter("mm_db_pool_timeouts_total", "Checkouts that gave up waiting for a connection")
+db_pool_wait_seconds = Histogram("mm_db_pool_wait_seconds", "Time spent waiting to check out a connection")
+query_budget_exceeded = Counter(
+    "mm_query_budget_exceeded_total", "Requests that ran more SQL statements than their route allows", ("route",)
+)
+
+
+# ---------- Per-request accounting ----------
+@dataclass(slots=True)
+class RequestStats:
+    queries: int = 0
+    query_seconds: float = 0.0
+    budget: Optional[int] = None  # set by query_budget()
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("mm_request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _request_stats.get()
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """Raised in QUERY_BUDGET_MODE=raise when a route exceeds its statement budget."""
+
+
+def record_query(elapsed: float) -> None:
+    db_query_seconds.observe(elapsed)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.query_seconds += elapsed
+        if settings.QUERY_BUDGET_MODE == "raise" and stats.budget is not None and stats.queries > stats.budget:
+            raise QueryBudgetExceeded(f"query budget of {stats.budget} exceeded ({stats.queries} statements)")
+
+
+def query_budget(max_queries: int):
+    """
+    Route dependency declaring how many SQL statements the route may run,
+    e.g. @router.get(..., dependencies=[query_budget(2)]). Enforced only
+    when QUERY_BUDGET_MODE is "log" or "raise".
+    """
+    async def declare_budget():
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.budget = max_queries
+    return Depends(declare_budget)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware (no BaseHTTPMiddleware overhead; streaming-safe)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_stats.reset(token)
+            # The router stores the matched route in the (shared) scope
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            http_request_seconds.observe(elapsed, scope["method"], path, str(status["code"]))
+            db_queries_per_request.observe(stats.queries, path)
+            db_query_seconds_per_request.observe(stats.query_seconds, path)
+            if stats.budget is not None and stats.queries > stats.budget and settings.QUERY_BUDGET_MODE != "off":
+                query_budget_exceeded.inc(path)
+                log.warning("query budget exceeded: %s %s ran %d statements (budget %d)",
+                            scope["method"], path, stats.queries, stats.budget)
@@ -1,8 +1,8 @@
-from datetime import datetime
-from typing import List, Optional
-from sqlalchemy import String, Text, SmallInteger, Boolean, ForeignKey, CheckConstraint, text
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
-from sqlalchemy.dialects.postgresql import UUID, BIGINT
+from datetime import date, datetime
+from typing import Any, List, Optional
+from sqlalchemy import String, Text, SmallInteger, Boolean, ForeignKey, CheckConstraint, Computed, Index, LargeBinary, func, text
+from sqlalchemy.orm import DeclarativeBase, Mapped, foreign, mapped_column, relationship
+from sqlalchemy.dialects.postgresql import UUID, BIGINT, TIMESTAMP, TSVECTOR
 from sqlalchemy import MetaData
 
 NAMING = {
@@ -31,31 +31,63 @@ class User(Base):
     is_active: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default=text("true"))
     created_at: Mapped[datetime] = mapped_column(nullable=False, server_default=text("now()"))
     updated_at: Mapped[datetime] = mapped_column(nullable=False, server_default=text("now()"))
+    # Bumped with every write to the user's journals or profile (app.conditional)
+    data_version: Mapped[int] = mapped_column(BIGINT, nullable=False, server_default=text("0"))
+    data_modified_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False, server_default=text("now()"))
 
     journals: Mapped[List["Journal"]] = relationship(back_populates="user", cascade="all, delete-orphan")
     sessions: Mapped[List["Session"]] = relationship(back_populates="user", cascade="all, delete-orphan")
     reminders: Mapped[List["Reminder"]] = relationship(back_populates="user", cascade="all, delete-orphan")
 
+# Case-insensitive uniqueness and the login/register lookup (app.accounts)
+Index("ix_users_email_lower", func.lower(User.email), unique=True)
+
 # ---------- JOURNALS ----------
+# Monthly RANGE partitions on created_at (see app.partitions). The table's
+# primary key must include the partition key; the mapper still identifies
+# rows by journal_id alone.
 class Journal(Base):
     __tablename__ = "journals"
     __table_args__ = (
         CheckConstraint("mood IS NULL OR mood BETWEEN 1 AND 10", name="ck_journals_mood"),
-        {"schema": APP_SCHEMA},
+        {"schema": APP_SCHEMA, "postgresql_partition_by": "RANGE (created_at)"},
     )
     journal_id: Mapped[str] = mapped_column(UUID(as_uuid=False), primary_key=True, server_default=text("gen_random_uuid()"))
     user_id: Mapped[str] = mapped_column(UUID(as_uuid=False), ForeignKey(f"{APP_SCHEMA}.users.user_id", ondelete="CASCADE"), nullable=False)
     content: Mapped[str] = mapped_column(Text, nullable=False)
     mood: Mapped[Optional[int]] = mapped_column(SmallInteger)
-    created_at: Mapped[datetime] = mapped_column(nullable=False, server_default=text("now()"))
+    created_at: Mapped[datetime] = mapped_column(primary_key=True, server_default=text("now()"))
+    # Full-text search vector, maintained by Postgres; deferred so list queries never load it
+    content_tsv: Mapped[Any] = mapped_column(
+        TSVECTOR, Computed("to_tsvector('english', content)", persisted=True), deferred=True
+    )
+    # Hashed bag-of-words vector (app.similarity), float16 bytes; deferred like content_tsv
+    content_vec: Mapped[Optional[bytes]] = mapped_column(LargeBinary, deferred=True)
+    # users.data_version at the time of the last write to this row (/sync)
+    change_seq: Mapped[int] = mapped_column(BIGINT, nullable=False, server_default=text("0"))
 
     user: Mapped["User"] = relationship(back_populates="journals")
+    # Never loaded implicitly: use selectinload(Journal.tags) where tags are needed.
+    # journal_tags has no FK to the partitioned table, so the joins are explicit.
     tags: Mapped[List["Tag"]] = relationship(
         secondary=f"{APP_SCHEMA}.journal_tags",
+        primaryjoin=lambda: Journal.journal_id == foreign(JournalTag.c.journal_id),
+        secondaryjoin=lambda: Tag.tag_id == foreign(JournalTag.c.tag_id),
         back_populates="journals",
-        lazy="selectin",
+        lazy="raise_on_sql",
     )
 
+    __mapper_args__ = {"primary_key": [journal_id]}
+
+# keyset paging for list_journals: WHERE user_id = ? ORDER BY created_at DESC, journal_id DESC
+Index(
+    "ix_journals_user_id_created_at",
+    Journal.user_id, Journal.created_at.desc(), Journal.journal_id.desc(),
+)
+Index("ix_journals_content_tsv", Journal.content_tsv, postgresql_using="gin")
+# delta sync: WHERE user_id = ? AND (change_seq, journal_id) > (?, ?) ORDER BY change_seq, journal_id
+Index("ix_journals_user_id_change_seq", Journal.user_id, Journal.change_seq, Journal.journal_id)
+
 # ---------- TAGS ----------
 class Tag(Base):
     __tablename__ = "tags"
@@ -63,21 +95,95 @@ class Tag(Base):
     tag_id: Mapped[int] = mapped_column(BIGINT, primary_key=True, autoincrement=True)
     name: Mapped[str] = mapped_column(String(50), nullable=False, unique=True)
 
+    # A popular tag links to a huge number of journals; never load them implicitly
     journals: Mapped[List[Journal]] = relationship(
         secondary=f"{APP_SCHEMA}.journal_tags",
+        primaryjoin=lambda: Tag.tag_id == foreign(JournalTag.c.tag_id),
+        secondaryjoin=lambda: Journal.journal_id == foreign(JournalTag.c.journal_id),
         back_populates="tags",
-        lazy="selectin",
+        lazy="raise_on_sql",
     )
 
+# prefix search for /tags/suggest: "C" collation serves both LIKE 'abc%' and ORDER BY
+Index("ix_tags_name_c", Tag.name.collate("C"))
+
 # ---------- JOURNAL_TAGS (association table only) ----------
+# journal_id is not a foreign key (journals is partitioned); links are removed
+# by the trg_journals_delete_tag_links trigger when journals are deleted
 from sqlalchemy import Table, Column
 JournalTag = Table(
     "journal_tags",
     Base.metadata,
-    Column("journal_id", UUID(as_uuid=False), ForeignKey(f"{APP_SCHEMA}.journals.journal_id", ondelete="CASCADE"), primary_key=True),
+    Column("journal_id", UUID(as_uuid=False), primary_key=True),
     Column("tag_id", BIGINT, ForeignKey(f"{APP_SCHEMA}.tags.tag_id", ondelete="CASCADE"), primary_key=True),
     schema=APP_SCHEMA,
 )
+Index("ix_journal_tags_tag_id", JournalTag.c.tag_id)
+
+# ---------- ANALYTICS ROLLUPS ----------
+# Maintained incrementally by app.analytics on journal insert/delete
+class JournalMoodRollup(Base):
+    __tablename__ = "journal_mood_rollups"
+    __table_args__ = (
+        CheckConstraint("granularity IN ('day','week','month')", name="ck_journal_mood_rollups_granularity"),
+        {"schema": APP_SCHEMA},
+    )
+    user_id: Mapped[str] = mapped_column(UUID(as_uuid=False), ForeignKey(f"{APP_SCHEMA}.users.user_id", ondelete="CASCADE"), primary_key=True)
+    granularity: Mapped[str] = mapped_column(String(5), primary_key=True)
+    period_start: Mapped[date] = mapped_column(primary_key=True)
+    entry_count: Mapped[int] = mapped_column(nullable=False, server_default=text("0"))
+    mood_count: Mapped[int] = mapped_column(nullable=False, server_default=text("0"))
+    mood_sum: Mapped[int] = mapped_column(BIGINT, nullable=False, server_default=text("0"))
+
+class UserTagCount(Base):
+    __tablename__ = "user_tag_counts"
+    __table_args__ = {"schema": APP_SCHEMA}
+    user_id: Mapped[str] = mapped_column(UUID(as_uuid=False), ForeignKey(f"{APP_SCHEMA}.users.user_id", ondelete="CASCADE"), primary_key=True)
+    tag_id: Mapped[int] = mapped_column(BIGINT, ForeignKey(f"{APP_SCHEMA}.tags.tag_id", ondelete="CASCADE"), primary_key=True)
+    entry_count: Mapped[int] = mapped_column(nullable=False, server_default=text("0"))
+
+# top tags per user: WHERE user_id = ? ORDER BY entry_count DESC
+Index("ix_user_tag_counts_user_id_entry_count", UserTagCount.user_id, UserTagCount.entry_count.desc())
+
+# ---------- ACCOUNT DELETIONS ----------
+# One row per DELETE /users/me; app.account_purge works through it in batches.
+# No FK to users: the row outlives the user as the record of the purge.
+class AccountDeletion(Base):
+    __tablename__ = "account_deletions"
+    __table_args__ = (
+        CheckConstraint("status IN ('pending','running','done')", name="ck_account_deletions_status"),
+        {"schema": APP_SCHEMA},
+    )
+    deletion_id: Mapped[str] = mapped_column(UUID(as_uuid=False), primary_key=True, server_default=text("gen_random_uuid()"))
+    user_id: Mapped[str] = mapped_column(UUID(as_uuid=False), nullable=False, unique=True)
+    status: Mapped[str] = mapped_column(String(16), nullable=False, server_default=text("'pending'"))
+    phase: Mapped[Optional[str]] = mapped_column(String(32))
+    rows_deleted: Mapped[int] = mapped_column(BIGINT, nullable=False, server_default=text("0"))
+    requested_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False, server_default=text("now()"))
+    updated_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False, server_default=text("now()"))
+    finished_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True))
+
+# purge queue: WHERE status <> 'done' ORDER BY requested_at
+Index(
+    "ix_account_deletions_requested_at", AccountDeletion.requested_at,
+    postgresql_where=AccountDeletion.status != "done",
+)
+
+# ---------- TOMBSTONES ----------
+# Hard deletes leave one of these so /sync can tell clients what to drop
+class Tombstone(Base):
+    __tablename__ = "tombstones"
+    __table_args__ = (
+        CheckConstraint("entity IN ('journal','session')", name="ck_tombstones_entity"),
+        {"schema": APP_SCHEMA},
+    )
+    user_id: Mapped[str] = mapped_column(UUID(as_uuid=False), ForeignKey(f"{APP_SCHEMA}.users.user_id", ondelete="CASCADE"), primary_key=True)
+    entity: Mapped[str] = mapped_column(String(16), primary_key=True)
+    entity_id: Mapped[str] = mapped_column(UUID(as_uuid=False), primary_key=True)
+    change_seq: Mapped[int] = mapped_column(BIGINT, nullable=False)
+    deleted_at: Mapped[datetime] = mapped_column(nullable=False, server_default=text("now()"))
+
+Index("ix_tombstones_user_id_change_seq", Tombstone.user_id, Tombstone.change_seq)
 
 # ---------- SESSIONS ----------
 class Session(Base):
@@ -92,25 +198,38 @@ class Session(Base):
     session_type: Mapped[str] = mapped_column(String(20), nullable=False)
     started_at: Mapped[datetime] = mapped_column(nullable=False, server_default=text("now()"))
     ended_at: Mapped[Optional[datetime]]
+    change_seq: Mapped[int] = mapped_column(BIGINT, nullable=False, server_default=text("0"))
 
     user: Mapped["User"] = relationship(back_populates="sessions")
     messages: Mapped[List["Message"]] = relationship(back_populates="session", cascade="all, delete-orphan")
 
+Index("ix_sessions_user_id_started_at", Session.user_id, Session.started_at.desc())
+Index("ix_sessions_user_id_change_seq", Session.user_id, Session.change_seq, Session.session_id)
+
 # ---------- MESSAGES ----------
+# Partitioned like journals; mapper identity is message_id
 class Message(Base):
     __tablename__ = "messages"
     __table_args__ = (
         CheckConstraint("role IN ('user','mentor','system')", name="ck_messages_role"),
-        {"schema": APP_SCHEMA},
+        {"schema": APP_SCHEMA, "postgresql_partition_by": "RANGE (created_at)"},
     )
     message_id: Mapped[str] = mapped_column(UUID(as_uuid=False), primary_key=True, server_default=text("gen_random_uuid()"))
     session_id: Mapped[str] = mapped_column(UUID(as_uuid=False), ForeignKey(f"{APP_SCHEMA}.sessions.session_id", ondelete="CASCADE"), nullable=False)
     role: Mapped[str] = mapped_column(String(16), nullable=False)
     content: Mapped[str] = mapped_column(Text, nullable=False)
-    created_at: Mapped[datetime] = mapped_column(nullable=False, server_default=text("now()"))
+    created_at: Mapped[datetime] = mapped_column(primary_key=True, server_default=text("now()"))
 
     session: Mapped["Session"] = relationship(back_populates="messages")
 
+    __mapper_args__ = {"primary_key": [message_id]}
+
+# message history: WHERE session_id = ? ORDER BY created_at DESC, message_id DESC
+Index(
+    "ix_messages_session_id_created_at",
+    Message.session_id, Message.created_at.desc(), Message.message_id.desc(),
+)
+
 # ---------- REMINDERS ----------
 class Reminder(Base):
     __tablename__ = "reminders"
@@ -125,5 +244,16 @@ class Reminder(Base):
     timezone: Mapped[str] = mapped_column(String(64), nullable=False, server_default=text("'America/New_York'"))
     is_active: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default=text("true"))
     created_at: Mapped[datetime] = mapped_column(nullable=False, server_default=text("now()"))
+    # Maintained by app.reminders; NULL until the dispatcher first evaluates the schedule
+    next_fire_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True))
+    last_fired_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True))
 
     user: Mapped["User"] = relationship(back_populates="reminders")
+
+Index("ix_reminders_user_id", Reminder.user_id)
+
+# due-reminder scan: WHERE is_active AND next_fire_at <= now() ORDER BY next_fire_at
+Index(
+    "ix_reminders_next_fire_at", Reminder.next_fire_at,
+    postgresql_where=Reminder.is_active,
+)
@@ -0,0 +1,24 @@
+# app/pagination.py
+import base64
+import json
+from typing import Any, List
+
+from fastapi import HTTPException
+
+
+def encode_cursor(*parts: Any) -> str:
+    """Pack keyset values into an opaque, URL-safe cursor string."""
+    raw = json.dumps(list(parts), separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Unpack a cursor made by encode_cursor; 400 if it is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        parts = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(400, "Invalid cursor")
+    if not isinstance(parts, list) or len(parts) != size:
+        raise HTTPException(400, "Invalid cursor")
+    return parts
@@ -0,0 +1,233 @@
+# app/partitions.py
+"""
+Partition maintenance for the time-partitioned tables.
+
+app.journals and app.messages are RANGE partitioned by created_at, one
+partition per month (<table>_pYYYYMM) plus <table>_default for rows outside
+every range. Each run:
+
+  1. creates the partitions for the next PARTITION_MONTHS_AHEAD months,
+     and for every past month that has rows in the default partition
+     (imports with historical created_at), from the oldest such row
+     onward (app.ensure_monthly_partitions, which moves the default
+     partition's rows for each month it creates);
+  2. if a retention is configured, detaches monthly partitions older than it
+     and moves them to PARTITION_ARCHIVE_SCHEMA. Detaching is a catalog
+     change, not a DELETE: no bloat and no vacuum debt. Archived tables can
+     be dumped and dropped, or attached again;
+  3. moves the journal_tags rows of archived journal partitions next to
+     them (<partition>_tags), since no FK or trigger removes them.
+
+Queries that bound created_at (keyset cursors, "last N days") are pruned to
+the matching partitions. Retention is off (0 months) by default.
+
+API workers run this every PARTITION_MAINTENANCE_INTERVAL_SECONDS
+(PartitionMaintainer, started by the app's lifespan), beginning at startup.
+Each step takes a transaction-level advisory lock and is skipped if another
+process holds it. With RUN_PARTITION_MAINTENANCE off, schedule one pass
+instead, e.g. daily from cron:
+
+    python -m app.partitions
+"""
+import asyncio
+import logging
+import re
+from datetime import date
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.db import SessionLocal
+
+log = logging.getLogger("mindmentor.partitions")
+
+# partitioned table -> retention setting
+PARTITIONED_TABLES = {
+    "journals": "JOURNAL_RETENTION_MONTHS",
+    "messages": "MESSAGE_RETENTION_MONTHS",
+}
+
+
+async def _try_lock(db: AsyncSession, key: str) -> bool:
+    """Transaction-scoped advisory lock; False if another maintenance run holds it."""
+    res = await db.execute(text("SELECT pg_try_advisory_xact_lock(hashtext(:key))"), {"key": key})
+    return res.scalar_one()
+
+
+async def ensure_partitions(db: AsyncSession, table: str, months_ahead: int) -> int:
+    """Create missing monthly partitions from the current month to months_ahead; returns how many."""
+    res = await db.execute(
+        text("SELECT app.ensure_monthly_partitions(CAST(:parent AS regclass), CAST(now() AS date), :ahead)"),
+        {"parent": f"app.{table}", "ahead": months_ahead},
+    )
+    return res.scalar_one()
+
+
+async def partition_default_rows(db: AsyncSession, table: str, months_ahead: int) -> int:
+    """
+    Create the monthly partitions that rows in <table>_default belong to
+    (every month from the oldest one up to now), moving those rows into
+    them. Returns how many partitions were created.
+    """
+    res = await db.execute(text(f'SELECT min(created_at) FROM app."{table}_default"'))
+    oldest = res.scalar_one()
+    if oldest is None:
+        return 0
+    res = await db.execute(
+        text("SELECT app.ensure_monthly_partitions(CAST(:parent AS regclass), CAST(:first AS date), :ahead)"),
+        {"parent": f"app.{table}", "first": oldest.date(), "ahead": months_ahead},
+    )
+    return res.scalar_one()
+
+
+def _months_before(today: date, months: int) -> date:
+    index = today.year * 12 + today.month - 1 - months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+async def archive_partitions(db: AsyncSession, table: str, keep_months: int, archive_schema: str) -> List[str]:
+    """
+    Detach monthly partitions that end before the retention window
+    (current month plus keep_months previous ones) into archive_schema.
+    """
+    cutoff = _months_before(date.today(), keep_months)
+    pattern = re.compile(rf"{table}_p(\d{{4}})(\d{{2}})")
+    res = await db.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = CAST(:parent AS regclass) ORDER BY c.relname"
+        ),
+        {"parent": f"app.{table}"},
+    )
+    old = []
+    for name in res.scalars():
+        m = pattern.fullmatch(name)
+        if m and date(int(m[1]), int(m[2]), 1) < cutoff:
+            old.append(name)
+    if not old:
+        return []
+
+    # DETACH needs a brief exclusive lock on the parent; don't queue behind long queries
+    await db.execute(text("SET LOCAL lock_timeout = '5s'"))
+    await db.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{archive_schema}"'))
+    for name in old:
+        await db.execute(text(f'ALTER TABLE app."{table}" DETACH PARTITION app."{name}"'))
+        await db.execute(text(f'ALTER TABLE app."{name}" SET SCHEMA "{archive_schema}"'))
+    return old
+
+
+async def archive_journal_tags(db: AsyncSession, archive_schema: str) -> List[str]:
+    """
+    Move the journal_tags rows of archived journal partitions into
+    <partition>_tags beside them. Picks every archived partition that has no
+    _tags table yet, so a run interrupted after the detach is finished by
+    the next one. Returns the partitions handled.
+    """
+    res = await db.execute(
+        text(
+            "SELECT c.relname FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE n.nspname = :schema AND c.relkind = 'r' AND c.relname ~ '^journals_p[0-9]{6}$' "
+            "AND to_regclass(format('%I.%I', n.nspname, c.relname || '_tags')) IS NULL "
+            "ORDER BY c.relname"
+        ),
+        {"schema": archive_schema},
+    )
+    names = list(res.scalars())
+    for name in names:
+        await db.execute(text(f'CREATE TABLE "{archive_schema}"."{name}_tags" (LIKE app.journal_tags)'))
+        await db.execute(text(
+            f'WITH moved AS ('
+            f'DELETE FROM app.journal_tags jt USING "{archive_schema}"."{name}" j '
+            f'WHERE jt.journal_id = j.journal_id RETURNING jt.*) '
+            f'INSERT INTO "{archive_schema}"."{name}_tags" SELECT * FROM moved'
+        ))
+    return names
+
+
+async def run_maintenance() -> Dict[str, dict]:
+    """
+    One maintenance pass over every partitioned table, one transaction per
+    table, then the tag links of archived journals in a separate one (the
+    detach holds a lock on the parent table, so it commits first).
+    """
+    report = {}
+    for table, retention_setting in PARTITIONED_TABLES.items():
+        keep_months = getattr(settings, retention_setting)
+        async with SessionLocal() as db:
+            if not await _try_lock(db, f"app.partitions.{table}"):
+                log.info("%s: maintenance running elsewhere, skipped", table)
+                continue
+            created = await ensure_partitions(db, table, settings.PARTITION_MONTHS_AHEAD)
+            created += await partition_default_rows(db, table, settings.PARTITION_MONTHS_AHEAD)
+            archived = []
+            if keep_months > 0:
+                archived = await archive_partitions(db, table, keep_months, settings.PARTITION_ARCHIVE_SCHEMA)
+            await db.commit()
+        report[table] = {"created": created, "archived": archived}
+        log.info("%s: created %d partition(s), archived %s", table, created, archived or "none")
+
+    async with SessionLocal() as db:
+        if await _try_lock(db, "app.partitions.journal_tags"):
+            moved = await archive_journal_tags(db, settings.PARTITION_ARCHIVE_SCHEMA)
+            await db.commit()
+            report["journal_tags"] = {"archived": moved}
+            if moved:
+                log.info("journal_tags: archived links of %s", moved)
+    return report
+
+
+class PartitionMaintainer:
+    """
+    run_maintenance() at startup, then every interval_seconds or sooner
+    when request_maintenance() is called, until stopped.
+    """
+
+    def __init__(self, interval_seconds: Optional[float] = None):
+        self.interval_seconds = interval_seconds or settings.PARTITION_MAINTENANCE_INTERVAL_SECONDS
+        self._stopping = asyncio.Event()
+        self._wake = asyncio.Event()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._wake.set()
+
+    async def run(self) -> None:
+        _maintainers.add(self)
+        try:
+            while not self._stopping.is_set():
+                self._wake.clear()
+                try:
+                    await run_maintenance()
+                except Exception:
+                    log.exception("partition maintenance failed")
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.interval_seconds)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            _maintainers.discard(self)
+
+
+_maintainers: Set[PartitionMaintainer] = set()
+
+
+def request_maintenance() -> None:
+    """
+    Run this worker's maintenance now instead of at the next interval, e.g.
+    after an import of historical entries, which wait in the default
+    partition until their months are created. A no-op without an
+    in-process PartitionMaintainer.
+    """
+    for m in _maintainers:
+        m._wake.set()
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(levelname)-5.5s [%(name)s] %(message)s")
+    asyncio.run(run_maintenance())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+# app/reminders.py
+"""
+Reminder dispatch engine.
+
+Each reminder row carries an indexed next_fire_at, so a tick only touches
+rows that are due:
+
+    SELECT ... WHERE is_active AND next_fire_at <= now()
+    ORDER BY next_fire_at LIMIT :batch FOR UPDATE SKIP LOCKED
+
+SKIP LOCKED lets any number of dispatcher processes share the load without
+double-firing. A claimed batch is delivered, its next_fire_at is advanced in
+one executemany UPDATE, and the transaction commits. Delivery is part of
+that transaction: the default deliver() queues one NOTIFY per reminder
+(app.events), which Postgres sends only on commit, to the EventListener in
+every API worker, which pushes it to the user's open streams. So a batch is
+either delivered and advanced, or neither (the rows stay due and are
+retried). Rows with NULL next_fire_at (new reminders) are primed the same
+way.
+
+Cron/timezone evaluation is memoized per (expression, timezone, minute), so
+a million reminders on "0 9 * * *" cost one croniter evaluation per tick.
+
+Run standalone (one or more processes):
+
+    python -m app.reminders
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Awaitable, Callable, List, Optional
+from zoneinfo import ZoneInfo
+
+from croniter import croniter
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.db import SessionLocal
+from app.events import notify_many
+from app.models import Reminder
+
+log = logging.getLogger("mindmentor.reminders")
+
+
+class InvalidSchedule(ValueError):
+    pass
+
+
+@lru_cache(maxsize=256)
+def _zone(name: str) -> ZoneInfo:
+    return ZoneInfo(name)
+
+
+@lru_cache(maxsize=settings.REMINDER_CRON_CACHE_SIZE)
+def _next_fire(expr: str, tz: str, after_minute: datetime) -> datetime:
+    try:
+        local = after_minute.astimezone(_zone(tz))
+        return croniter(expr, local).get_next(datetime).astimezone(timezone.utc)
+    except Exception as e:  # bad cron text, unknown zone, ...
+        raise InvalidSchedule(f"{expr!r} in {tz!r}: {e}") from e
+
+
+def next_fire_time(expr: str, tz: str, after: datetime) -> datetime:
+    """Next UTC fire time strictly after `after` (aware). Cron has minute resolution."""
+    return _next_fire(expr, tz, after.astimezone(timezone.utc).replace(second=0, microsecond=0))
+
+
+async def log_and_push(session: AsyncSession, reminders: List[Reminder]) -> None:
+    """
+    Default delivery: a `reminder` event for the user's open streams on any
+    API worker, sent when the claiming transaction commits.
+    """
+    await notify_many(
+        session, [(r.user_id, "reminder", {"reminder_id": r.reminder_id, "kind": r.kind}) for r in reminders]
+    )
+    log.info("dispatched %d reminders", len(reminders))
+
+
+# Called with the claiming session; must deliver within (or before) its commit
+Deliver = Callable[[AsyncSession, List[Reminder]], Awaitable[None]]
+
+
+class ReminderDispatcher:
+    def __init__(self, deliver: Deliver = log_and_push, batch_size: Optional[int] = None,
+                 poll_seconds: Optional[float] = None):
+        self.deliver = deliver
+        self.batch_size = batch_size or settings.REMINDER_BATCH_SIZE
+        self.poll_seconds = poll_seconds or settings.REMINDER_POLL_SECONDS
+        self.dispatched = 0
+        self._stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def run(self) -> None:
+        log.info("reminder dispatcher started (batch=%d)", self.batch_size)
+        while not self._stopping.is_set():
+            try:
+                busy = await self.tick()
+            except Exception:
+                log.exception("reminder tick failed")
+                busy = False
+            if not busy:
+                await self._sleep_until_next_due()
+
+    async def tick(self) -> bool:
+        """Prime new rows and dispatch one due batch. True if more work is likely waiting."""
+        primed = await self._prime()
+        fired = await self._dispatch_due()
+        return primed == self.batch_size or fired == self.batch_size
+
+    async def _claim(self, session: AsyncSession, where) -> List[Reminder]:
+        res = await session.execute(
+            select(Reminder)
+            .where(Reminder.is_active, where)
+            .order_by(Reminder.next_fire_at)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        return list(res.scalars().all())
+
+    async def _prime(self) -> int:
+        async with SessionLocal() as session:
+            rows = await self._claim(session, Reminder.next_fire_at.is_(None))
+            if rows:
+                await self._reschedule(session, rows, datetime.now(timezone.utc), fired=False)
+                await session.commit()
+            return len(rows)
+
+    async def _dispatch_due(self) -> int:
+        async with SessionLocal() as session:
+            rows = await self._claim(session, Reminder.next_fire_at <= func.now())
+            if not rows:
+                return 0
+            await self.deliver(session, rows)
+            # Advance from "now", not from the old due time: after downtime a
+            # reminder fires once instead of replaying every missed slot
+            await self._reschedule(session, rows, datetime.now(timezone.utc), fired=True)
+            await session.commit()
+            self.dispatched += len(rows)
+            return len(rows)
+
+    async def _reschedule(self, session: AsyncSession, rows: List[Reminder], now: datetime, fired: bool) -> None:
+        params = []
+        for r in rows:
+            p = {"reminder_id": r.reminder_id}
+            try:
+                p["next_fire_at"] = next_fire_time(r.schedule_cron, r.timezone, now)
+            except InvalidSchedule as e:
+                log.warning("deactivating reminder %s: %s", r.reminder_id, e)
+                p["next_fire_at"], p["is_active"] = None, False
+            if fired:
+                p["last_fired_at"] = now
+            params.append(p)
+        # ORM bulk UPDATE by primary key: a single executemany
+        await session.execute(update(Reminder), params)
+
+    async def _sleep_until_next_due(self) -> None:
+        async with SessionLocal() as session:
+            nxt = (await session.execute(
+                select(func.min(Reminder.next_fire_at)).where(Reminder.is_active)
+            )).scalar_one_or_none()
+        delay = self.poll_seconds
+        if nxt is not None:
+            delay = min(delay, max((nxt - datetime.now(timezone.utc)).total_seconds(), 0.0))
+        try:
+            await asyncio.wait_for(self._stopping.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(levelname)-5.5s [%(name)s] %(message)s")
+    asyncio.run(ReminderDispatcher().run())
+
+
+if __name__ == "__main__":
+    main()
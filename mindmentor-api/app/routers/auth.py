@@ -1,41 +1,57 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError
 from fastapi.security import OAuth2PasswordBearer
-from app.db import get_db
+from app.db import get_db, read_session
+from app.metrics import query_budget
 from app.models import User
 from app.schemas import UserCreate, UserOut, Token, Login
-from app.security import hash_password, verify_password, create_access_token, decode_token
+from app.accounts import get_user_by_email, normalize_email
+from app.admission import check_auth_rate
+from app.auth_cache import CurrentUser, principal_cache
+from app.security import hash_password_async, verify_password_async, create_access_token, decode_token
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-@router.post("/register", response_model=UserOut, status_code=201)
-async def register(payload: UserCreate, db: AsyncSession = Depends(get_db)):
-    exists = await db.execute(select(User).where(User.email == payload.email))
-    if exists.scalar_one_or_none():
+@router.post("/register", response_model=UserOut, status_code=201, dependencies=[query_budget(3)])
+async def register(payload: UserCreate, request: Request, db: AsyncSession = Depends(get_db)):
+    check_auth_rate(request, payload.email)
+    # Cheap early exit before paying for bcrypt; the unique index settles races
+    if await get_user_by_email(db, payload.email):
         raise HTTPException(400, "Email already registered")
     u = User(
-        email=payload.email,
+        email=normalize_email(payload.email),
         display_name=payload.display_name or None,
-        hashed_password=hash_password(payload.password),
+        hashed_password=await hash_password_async(payload.password),
     )
     db.add(u)
-    await db.flush()
+    try:
+        await db.flush()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(400, "Email already registered")
     await db.commit()
     await db.refresh(u)  # pull server defaults (created_at, is_active)
     return UserOut.model_validate(u)
 
-@router.post("/login", response_model=Token)
-async def login(payload: Login, db: AsyncSession = Depends(get_db)):
-    res = await db.execute(select(User).where(User.email == payload.email))
-    u = res.scalar_one_or_none()
-    if not u or not verify_password(payload.password, u.hashed_password):
+@router.post("/login", response_model=Token, dependencies=[query_budget(1)])
+async def login(payload: Login, request: Request, db: AsyncSession = Depends(get_db)):
+    check_auth_rate(request, payload.email)
+    u = await get_user_by_email(db, payload.email)
+    if not u or not await verify_password_async(payload.password, u.hashed_password):
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Invalid credentials")
+    if not u.is_active:
+        # Deactivated (e.g. pending account deletion); checked after the password so it leaks nothing
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Inactive user")
     return Token(access_token=create_access_token(str(u.user_id)))
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> User:
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> CurrentUser:
+    cached = principal_cache.get(token)
+    if cached is not None:
+        return cached
     try:
         payload = decode_token(token)
         uid = payload.get("sub")
@@ -47,4 +63,14 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession
     u = res.scalar_one_or_none()
     if not u:
         raise HTTPException(401, "User not found")
-    return u
+    if not u.is_active:
+        raise HTTPException(401, "Inactive user")
+    current = CurrentUser.from_user(u)
+    principal_cache.put(token, payload, current)
+    return current
+
+
+async def get_user_read_db(user: CurrentUser = Depends(get_current_user)):
+    """Read-only session for the current user's data (replica unless they just wrote)."""
+    async with read_session(user.user_id) as session:
+        yield session
@@ -1,6 +1,8 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy import text
-from app.db import get_session
+from app.db import get_session, pool_stats, replica_stats
+from app.security import hasher_stats
+from app.auth_cache import principal_cache
 
 router = APIRouter(prefix="/health", tags=["health"])
 
@@ -12,7 +14,17 @@ async def health():
 @router.get("/db")
 async def db_health(session = Depends(get_session)):
     await session.execute(text("SELECT 1"))
-    return {"ok": True}
+    return {"ok": True, "pool": pool_stats(), "replica": replica_stats()}
+
+@router.get("/hasher")
+async def hasher_health():
+    """bcrypt pool: queue depth, rejections and hash timings."""
+    return hasher_stats()
+
+@router.get("/auth-cache")
+async def auth_cache_health():
+    """Principal cache size and hit/miss counters."""
+    return principal_cache.stats()
 
 @router.get("/ping")
 def ping():
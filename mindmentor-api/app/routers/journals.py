@@ -1,97 +1,409 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+from typing import List, Literal, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select, delete
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy import BigInteger, select, delete, func, literal, literal_column, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 
-from app.db import get_db
-from app.schemas import JournalCreate
-from app.models import Journal, Tag, JournalTag, User  # JournalTag is a Table
-from .auth import get_current_user
+from app.config import settings
+from app.db import get_db, note_write, SessionLocal
+from app.metrics import query_budget
+from app.partitions import request_maintenance
+from app.schemas import JournalCreate, JournalBulkCreate, JournalOut, JournalPage
+from app.models import Journal, Tag, JournalTag, JournalMoodRollup, Tombstone, UserTagCount
+from app.analytics import apply_journal_rollups
+from app.conditional import bump_data_version, current_version, is_not_modified, not_modified, validators
+from app.auth_cache import CurrentUser
+from app.pagination import encode_cursor, decode_cursor
+from app.journal_batcher import journal_batcher
+from app.journal_writes import insert_journals
+from app.similarity import similarity_cache
+from .auth import get_current_user, get_user_read_db
 
 router = APIRouter(prefix="/journals", tags=["journals"])
 
+# Must match the config used by the content_tsv generated column
+FTS_CONFIG = literal_column("'english'::regconfig")
 
-@router.post("", status_code=201)
+# Sparse fieldsets for list_journals (?fields=)
+JOURNAL_FIELDS = ("journal_id", "user_id", "content", "mood", "created_at", "tags")
+DEFAULT_JOURNAL_FIELDS = ("journal_id", "content", "mood", "created_at")
+
+# Built once at import; validation and JSON encoding run in pydantic-core
+_journal_list = TypeAdapter(List[JournalOut])
+_journal_page = TypeAdapter(JournalPage)
+
+
+@router.post("", status_code=201, dependencies=[query_budget(8)])
 async def create_journal(
     payload: JournalCreate,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: CurrentUser = Depends(get_current_user),
 ):
     """
     Create a journal entry for the authenticated user.
-    - Upserts tags by name (lowercased)
+    - Upserts tags by name (lowercased) in a single statement
     - Links via JournalTag (composite PK: journal_id + tag_id)
     - Uses ON CONFLICT DO NOTHING to avoid duplicates
     """
-    print(payload)
-    # 1) Create the journal row
-    j = Journal(user_id=user.user_id, content=payload.content, mood=payload.mood)
-    db.add(j)
-    await db.flush()  # get j.journal_id
-
-    # 2) Upsert + link tags
-    for raw in (payload.tags or []):
-        name = (raw or "").strip().lower()
-        if not name:
-            continue
-
-        # get-or-create tag
-        res = await db.execute(select(Tag).where(Tag.name == name))
-        tag = res.scalar_one_or_none()
-        if not tag:
-            tag = Tag(name=name)
-            db.add(tag)
-            await db.flush()  # get tag.tag_id
-
-        # link in association table (JournalTag is a Table here)
-        stmt = (
-            pg_insert(JournalTag)
-            .values(journal_id=j.journal_id, tag_id=tag.tag_id)
-            .on_conflict_do_nothing(index_elements=["journal_id", "tag_id"])
-        )
-        await db.execute(stmt)
+    if journal_batcher.enabled:
+        # Shared transaction with other concurrent creates; not on this session
+        journal_id = await journal_batcher.submit(user.user_id, payload)
+    else:
+        (journal_id,) = await insert_journals(db, user.user_id, [payload])
+        await db.commit()
+    note_write(user.user_id)
+    return {"journal_id": journal_id}
+
+
+@router.post("/bulk", status_code=201)
+async def bulk_create_journals(
+    payload: JournalBulkCreate,
+    db: AsyncSession = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user),
+):
+    """
+    Import many journal entries at once (e.g. migrating from another app).
+    Rows are inserted in batches of BULK_IMPORT_BATCH_SIZE to stay under the
+    driver's bind-parameter limit; the whole import commits atomically.
+    """
+    entries = payload.entries
+    if len(entries) > settings.BULK_IMPORT_MAX_ENTRIES:
+        raise HTTPException(413, f"At most {settings.BULK_IMPORT_MAX_ENTRIES} entries per request")
 
+    journal_ids = []
+    size = settings.BULK_IMPORT_BATCH_SIZE
+    for i in range(0, len(entries), size):
+        journal_ids += await insert_journals(db, user.user_id, entries[i:i + size])
     await db.commit()
-    return {"journal_id": j.journal_id}
+    note_write(user.user_id)
+    if any(e.created_at is not None for e in entries):
+        # Backdated entries sit in journals_default until their months exist
+        request_maintenance()
+    return {"count": len(journal_ids), "journal_ids": journal_ids}
 
 
-@router.get("", summary="List journals for current user")
+@router.get("", summary="List journals for current user", dependencies=[query_budget(4)])
 async def list_journals(
+    request: Request,
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
-    db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    cursor: Optional[str] = Query(
+        None,
+        description="Keyset cursor. Pass an empty value for the first page, then "
+        "the returned next_cursor. Omit to use legacy offset paging.",
+    ),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated subset of " + ",".join(JOURNAL_FIELDS)
+        + " (default: journal_id,content,mood,created_at)",
+    ),
+    db: AsyncSession = Depends(get_user_read_db),
+    user: CurrentUser = Depends(get_current_user),
 ):
+    """
+    Selects only the requested columns as Core rows (no ORM identity map),
+    validates the page in one TypeAdapter call and serializes it straight to
+    JSON bytes. Use e.g. ?fields=journal_id,mood,created_at to skip content.
+    Carries an ETag/Last-Modified from the user's data version; a matching
+    If-None-Match gets a 304 without running the list query.
+    """
+    wanted = _parse_fields(fields)
+    version, modified_at = await current_version(db, user.user_id)
+    headers = validators(user.user_id, version, modified_at, limit, offset, cursor, sorted(wanted))
+    if is_not_modified(request, headers):
+        return not_modified(headers)
+    cols = [
+        tags_subquery().label("tags") if f == "tags" else getattr(Journal, f)
+        for f in JOURNAL_FIELDS if f in wanted  # fixed order keeps one cached statement per fieldset
+    ]
+    # The keyset needs created_at/journal_id even if the client did not ask for them
+    if "created_at" not in wanted:
+        cols.append(Journal.created_at)
     q = (
-        select(Journal)
+        select(*cols)
         .where(Journal.user_id == user.user_id)
-        .order_by(Journal.created_at.desc())
-        .limit(limit)
-        .offset(offset)
+        .order_by(Journal.created_at.desc(), Journal.journal_id.desc())
     )
-    rows = (await db.execute(q)).scalars().all()
-    return [
+    if cursor is None:
+        # Legacy offset paging: returns a bare list
+        rows = (await db.execute(q.limit(limit).offset(offset))).mappings().all()
+        items = _journal_list.validate_python(rows)
+        return _json(_journal_list.dump_json(items, include={"__all__": wanted}, exclude_unset=True), headers)
+
+    # Keyset paging on (created_at, journal_id): served straight from
+    # ix_journals_user_id_created_at, no matter how deep the page is.
+    # Partition pruning ignores row comparisons, so every page also carries
+    # a plain created_at bound: later pages skip the newer partitions, and
+    # the first page tries only the last JOURNAL_FIRST_PAGE_WINDOW_DAYS.
+    q = q.limit(limit + 1)  # one extra row tells whether another page exists
+    window = settings.JOURNAL_FIRST_PAGE_WINDOW_DAYS
+    if cursor:
+        ts, jid = decode_cursor(cursor, 2)
+        try:
+            ts = datetime.fromisoformat(ts)
+            jid = str(UUID(jid))
+        except (TypeError, ValueError, AttributeError):
+            raise HTTPException(400, "Invalid cursor")
+        q = q.where(Journal.created_at <= ts, tuple_(Journal.created_at, Journal.journal_id) < (ts, jid))
+        rows = (await db.execute(q)).mappings().all()
+    elif window > 0:
+        # created_at is naive UTC; a timestamptz bound would cast the column and defeat pruning
+        since = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=window)
+        rows = (await db.execute(q.where(Journal.created_at >= since))).mappings().all()
+        if len(rows) <= limit:  # the window did not fill the page: read the whole history
+            rows = (await db.execute(q)).mappings().all()
+    else:
+        rows = (await db.execute(q)).mappings().all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["created_at"].isoformat(), rows[-1]["journal_id"])
+    page = _journal_page.validate_python({"items": rows, "next_cursor": next_cursor})
+    return _json(_journal_page.dump_json(
+        page, include={"items": {"__all__": wanted}, "next_cursor": True}, exclude_unset=True
+    ), headers)
+
+
+@router.get("/search", summary="Full-text search over the current user's journals", dependencies=[query_budget(2)])
+async def search_journals(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    db: AsyncSession = Depends(get_user_read_db),
+    user: CurrentUser = Depends(get_current_user),
+):
+    """
+    Ranked search using the stored content_tsv column (GIN-indexed).
+    Accepts web-search syntax ("quoted phrases", or, -exclude). Returns
+    highlighted snippets instead of full content; pages by (rank, journal_id).
+    """
+    tsq = func.websearch_to_tsquery(FTS_CONFIG, q)
+    rank = func.ts_rank_cd(Journal.content_tsv, tsq)
+    stmt = (
+        select(
+            Journal.journal_id,
+            Journal.mood,
+            Journal.created_at,
+            rank.label("rank"),
+            # Postgres defers this expensive call until after ORDER BY/LIMIT
+            func.ts_headline(
+                FTS_CONFIG, Journal.content, tsq, "MaxFragments=2, MinWords=5, MaxWords=20"
+            ).label("snippet"),
+        )
+        .where(Journal.user_id == user.user_id, Journal.content_tsv.bool_op("@@")(tsq))
+        .order_by(rank.desc(), Journal.journal_id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        r, jid = decode_cursor(cursor, 2)
+        try:
+            r = float(r)
+            jid = str(UUID(jid))
+        except (TypeError, ValueError, AttributeError):
+            raise HTTPException(400, "Invalid cursor")
+        stmt = stmt.where(tuple_(rank, Journal.journal_id) < (r, jid))
+
+    rows = (await db.execute(stmt)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].rank, rows[-1].journal_id)
+    return {"items": [dict(r._mapping) for r in rows], "next_cursor": next_cursor}
+
+
+@router.get("/stats", summary="Mood averages and tag frequencies for current user", dependencies=[query_budget(3)])
+async def journal_stats(
+    granularity: Literal["day", "week", "month"] = Query("week"),
+    periods: int = Query(12, ge=1, le=366),
+    top_tags: int = Query(10, ge=0, le=100),
+    db: AsyncSession = Depends(get_user_read_db),
+    user: CurrentUser = Depends(get_current_user),
+):
+    """
+    Reads the incrementally maintained rollup tables, so cost depends on
+    `periods` and `top_tags`, not on how much history the user has.
+    """
+    res = await db.execute(
+        select(
+            JournalMoodRollup.period_start,
+            JournalMoodRollup.entry_count,
+            JournalMoodRollup.mood_count,
+            JournalMoodRollup.mood_sum,
+        )
+        .where(
+            JournalMoodRollup.user_id == user.user_id,
+            JournalMoodRollup.granularity == granularity,
+            JournalMoodRollup.entry_count > 0,
+        )
+        .order_by(JournalMoodRollup.period_start.desc())
+        .limit(periods)
+    )
+    series = [
         {
+            "period_start": r.period_start,
+            "entries": r.entry_count,
+            "avg_mood": round(r.mood_sum / r.mood_count, 2) if r.mood_count else None,
+        }
+        for r in res.all()
+    ]
+
+    tags = []
+    if top_tags:
+        res = await db.execute(
+            select(Tag.name, UserTagCount.entry_count)
+            .join(Tag, Tag.tag_id == UserTagCount.tag_id)
+            .where(UserTagCount.user_id == user.user_id, UserTagCount.entry_count > 0)
+            .order_by(UserTagCount.entry_count.desc(), Tag.name)
+            .limit(top_tags)
+        )
+        tags = [{"name": name, "count": count} for name, count in res.all()]
+
+    return {"granularity": granularity, "series": series, "tags": tags}
+
+
+@router.get("/export", summary="Stream all journals of current user as NDJSON or CSV", dependencies=[query_budget(2)])
+async def export_journals(
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    user: CurrentUser = Depends(get_current_user),
+):
+    """
+    Streams every journal (oldest first) with its tags. Rows come from a
+    server-side cursor in EXPORT_FETCH_SIZE chunks, so memory stays flat
+    regardless of how many entries the user has.
+    """
+    stmt = (
+        select(Journal.journal_id, Journal.created_at, Journal.mood, Journal.content, tags_subquery().label("tags"))
+        .where(Journal.user_id == user.user_id)
+        .order_by(Journal.created_at, Journal.journal_id)
+        .execution_options(yield_per=settings.EXPORT_FETCH_SIZE)
+    )
+    encode = _export_ndjson if format == "ndjson" else _export_csv
+
+    async def body():
+        # Own session: request-scoped dependencies are closed before the body is streamed
+        async with SessionLocal() as session:
+            result = await session.stream(stmt)
+            if format == "csv":
+                yield "journal_id,created_at,mood,tags,content\r\n"
+            async for rows in result.partitions():
+                yield encode(rows)
+
+    media_type = "application/x-ndjson" if format == "ndjson" else "text/csv"
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="journals.{format}"'},
+    )
+
+
+def _export_ndjson(rows) -> str:
+    return "".join(
+        json.dumps({
             "journal_id": r.journal_id,
-            "content": r.content,
+            "created_at": r.created_at.isoformat(),
             "mood": r.mood,
-            "created_at": r.created_at,
-        }
+            "tags": r.tags or [],
+            "content": r.content,
+        }) + "\n"
         for r in rows
-    ]
+    )
+
+
+def _export_csv(rows) -> str:
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    for r in rows:
+        w.writerow([r.journal_id, r.created_at.isoformat(), r.mood, ", ".join(r.tags or []), r.content])
+    return buf.getvalue()
 
 
-@router.delete("/{journal_id}", status_code=204)
+def _parse_fields(fields: Optional[str]) -> set:
+    if not fields:
+        return set(DEFAULT_JOURNAL_FIELDS)
+    wanted = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = wanted - set(JOURNAL_FIELDS)
+    if unknown:
+        raise HTTPException(400, f"Unknown fields: {', '.join(sorted(unknown))}")
+    return wanted | {"journal_id"}
+
+
+def tags_subquery():
+    """Correlated array_agg of a journal's tag names ('{}' when untagged)."""
+    return (
+        select(func.coalesce(func.array_agg(Tag.name), literal_column("'{}'")))
+        .select_from(JournalTag.join(Tag, Tag.tag_id == JournalTag.c.tag_id))
+        .where(JournalTag.c.journal_id == Journal.journal_id)
+        .scalar_subquery()
+    )
+
+
+def _json(body: bytes, headers: Optional[dict] = None) -> Response:
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/{journal_id}/related", summary="Entries most similar to this one", dependencies=[query_budget(5)])
+async def related_journals(
+    journal_id: UUID,
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_user_read_db),
+    user: CurrentUser = Depends(get_current_user),
+):
+    """
+    Ranks all of the user's entries against this one (content and tags) with
+    one NumPy matrix-vector product over cached vectors. After the first
+    call, a request costs the version check, plus a delta fetch when the
+    user's journals changed, plus one query for the winners' details.
+    """
+    version, _ = await current_version(db, user.user_id)
+    matrix = await similarity_cache.get(db, user.user_id, version)
+    ranked = matrix.related(str(journal_id), limit)
+    if ranked is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    if not ranked:
+        return {"items": []}
+    res = await db.execute(
+        select(Journal.journal_id, Journal.content, Journal.mood, Journal.created_at)
+        .where(Journal.user_id == user.user_id, Journal.journal_id.in_([jid for jid, _ in ranked]))
+    )
+    rows = {r["journal_id"]: r for r in res.mappings()}
+    return {"items": [{**rows[jid], "score": score} for jid, score in ranked if jid in rows]}
+
+
+@router.delete("/{journal_id}", status_code=204, dependencies=[query_budget(5)])
 async def delete_journal(
     journal_id: UUID,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: CurrentUser = Depends(get_current_user),
 ):
-    q = delete(Journal).where(
-        Journal.journal_id == journal_id, Journal.user_id == user.user_id
+    # Subtract from the rollups while the row and its tag links still exist
+    await apply_journal_rollups(db, user.user_id, [str(journal_id)], -1)
+    seq = await bump_data_version(db, user.user_id)
+    # Delete and leave a tombstone for /sync in one statement
+    deleted = (
+        delete(Journal)
+        .where(Journal.journal_id == str(journal_id), Journal.user_id == user.user_id)
+        .returning(Journal.journal_id, Journal.user_id)
+        .cte("deleted")
+    )
+    q = (
+        pg_insert(Tombstone)
+        .from_select(
+            ["user_id", "entity", "entity_id", "change_seq"],
+            select(deleted.c.user_id, literal("journal"), deleted.c.journal_id, literal(seq, BigInteger)),
+        )
+        .on_conflict_do_nothing()
+        .add_cte(deleted)
     )
     res = await db.execute(q)
     if res.rowcount == 0:
+        # Nothing deleted; the version bump rolls back with the session
         raise HTTPException(status_code=404, detail="Not found")
     await db.commit()
+    note_write(user.user_id)
@@ -0,0 +1,60 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app import metrics
+from app.auth_cache import principal_cache
+from app.events import broker
+from app.similarity import similarity_cache
+from app.tag_cache import tag_catalog
+from app.security import hasher_stats
+
+router = APIRouter(tags=["metrics"])
+
+metrics.register_gauge(
+    "mm_password_hash_queue_depth", "bcrypt calls waiting for a worker", lambda: hasher_stats()["queued"]
+)
+metrics.register_gauge(
+    "mm_password_hash_running", "bcrypt calls currently running", lambda: hasher_stats()["running"]
+)
+metrics.register_counter(
+    "mm_password_hash_rejected_total", "bcrypt calls rejected because the pool was full", lambda: hasher_stats()["rejected"]
+)
+metrics.register_counter(
+    "mm_password_hash_calls_total", "bcrypt calls completed", lambda: hasher_stats()["calls"]
+)
+metrics.register_counter(
+    "mm_password_hash_seconds_total", "Time spent in bcrypt calls", lambda: hasher_stats()["seconds_total"]
+)
+metrics.register_gauge(
+    "mm_password_hash_seconds_avg", "Average bcrypt call duration", lambda: hasher_stats()["seconds_avg"]
+)
+metrics.register_gauge(
+    "mm_password_hash_seconds_max", "Slowest bcrypt call so far", lambda: hasher_stats()["seconds_max"]
+)
+metrics.register_counter(
+    "mm_auth_cache_lookups_total", "Principal cache lookups by result",
+    lambda: {"hit": principal_cache.hits, "miss": principal_cache.misses}, label="result",
+)
+metrics.register_gauge("mm_auth_cache_size", "Principal cache entries", lambda: principal_cache.stats()["size"])
+metrics.register_counter(
+    "mm_auth_cache_invalidations_total", "Cached principals dropped by invalidate_user", lambda: principal_cache.invalidations
+)
+
+metrics.register_gauge("mm_event_streams_open", "Open server-sent event streams", broker.connections)
+metrics.register_counter("mm_events_published_total", "Events queued to streams", lambda: broker.published)
+metrics.register_counter("mm_events_dropped_total", "Streams ended because their send queue was full", lambda: broker.dropped)
+
+metrics.register_counter(
+    "mm_tag_cache_lookups_total", "Tag catalog lookups by result",
+    lambda: {"hit": tag_catalog.hits, "miss": tag_catalog.misses}, label="result",
+)
+
+metrics.register_counter(
+    "mm_similarity_cache_lookups_total", "Related-entries matrix lookups by result",
+    lambda: {k: similarity_cache.stats()[k] for k in ("hits", "delta_loads", "full_loads")}, label="result",
+)
+metrics.register_gauge("mm_similarity_cache_bytes", "Memory held by cached user matrices", lambda: similarity_cache.stats()["bytes"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,195 @@
+import asyncio
+import json
+from datetime import datetime
+from typing import List, Optional
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, update, func, literal, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.auth_cache import CurrentUser
+from app.conditional import bump_data_version
+from app.config import settings
+from app.db import get_db
+from app.events import broker, notify
+from app.metrics import query_budget
+from app.models import Session as ChatSession, Message
+from app.pagination import encode_cursor, decode_cursor
+from app.schemas import SessionCreate, SessionOut, MessageCreate, MessageOut
+from .auth import get_current_user
+
+router = APIRouter(prefix="/sessions", tags=["sessions"])
+
+
+@router.post("", response_model=SessionOut, status_code=201, dependencies=[query_budget(3)])
+async def create_session(
+    payload: SessionCreate,
+    db: AsyncSession = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user),
+):
+    seq = await bump_data_version(db, user.user_id)
+    res = await db.execute(
+        pg_insert(ChatSession)
+        .values(user_id=user.user_id, session_type=payload.session_type, change_seq=seq)
+        .returning(ChatSession.session_id, ChatSession.session_type, ChatSession.started_at, ChatSession.ended_at)
+    )
+    row = res.one()
+    await db.commit()
+    return SessionOut.model_validate(row)
+
+
+@router.get("", response_model=List[SessionOut], summary="List sessions for current user", dependencies=[query_budget(2)])
+async def list_sessions(
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user),
+):
+    res = await db.execute(
+        select(ChatSession.session_id, ChatSession.session_type, ChatSession.started_at, ChatSession.ended_at)
+        .where(ChatSession.user_id == user.user_id)
+        .order_by(ChatSession.started_at.desc())
+        .limit(limit)
+    )
+    return [SessionOut.model_validate(r) for r in res.all()]
+
+
+@router.post("/{session_id}/end", response_model=SessionOut, dependencies=[query_budget(4)])
+async def end_session(
+    session_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user),
+):
+    # Rolled back with the session if nothing matches
+    seq = await bump_data_version(db, user.user_id)
+    res = await db.execute(
+        update(ChatSession)
+        .where(
+            ChatSession.session_id == str(session_id),
+            ChatSession.user_id == user.user_id,
+            ChatSession.ended_at.is_(None),
+        )
+        .values(ended_at=func.now(), change_seq=seq)
+        .returning(ChatSession.session_id, ChatSession.session_type, ChatSession.started_at, ChatSession.ended_at)
+    )
+    row = res.one_or_none()
+    if row is None:
+        raise HTTPException(404, "Session not found or already ended")
+    out = SessionOut.model_validate(row)
+    await notify(db, user.user_id, "session_ended", out.model_dump(mode="json"))
+    await db.commit()
+    return out
+
+
+@router.post("/{session_id}/messages", response_model=MessageOut, status_code=201, dependencies=[query_budget(3)])
+async def create_message(
+    session_id: UUID,
+    payload: MessageCreate,
+    db: AsyncSession = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user),
+):
+    """
+    Append a user message; ownership and open-session checks happen in the
+    same INSERT. The role is always "user", so clients cannot post (and push
+    to the user's other streams) mentor or system messages.
+    """
+    src = select(ChatSession.session_id, literal("user"), literal(payload.content)).where(
+        ChatSession.session_id == str(session_id),
+        ChatSession.user_id == user.user_id,
+        ChatSession.ended_at.is_(None),
+    )
+    res = await db.execute(
+        pg_insert(Message)
+        .from_select(["session_id", "role", "content"], src)
+        .returning(Message.message_id, Message.session_id, Message.role, Message.content, Message.created_at)
+    )
+    row = res.one_or_none()
+    if row is None:
+        raise HTTPException(404, "Session not found or already ended")
+    out = MessageOut.model_validate(row)
+    await notify(db, user.user_id, "message", out.model_dump(mode="json"))
+    await db.commit()
+    return out
+
+
+@router.get("/{session_id}/messages", summary="Message history, newest first", dependencies=[query_budget(3)])
+async def list_messages(
+    session_id: UUID,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    db: AsyncSession = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user),
+):
+    owned = await db.execute(
+        select(ChatSession.started_at).where(
+            ChatSession.session_id == str(session_id), ChatSession.user_id == user.user_id
+        )
+    )
+    started_at = owned.scalar_one_or_none()
+    if started_at is None:
+        raise HTTPException(404, "Session not found")
+
+    # Plain created_at bounds (row comparisons are not used for partition
+    # pruning): a session's messages all fall on or after its start
+    q = (
+        select(Message.message_id, Message.session_id, Message.role, Message.content, Message.created_at)
+        .where(Message.session_id == str(session_id), Message.created_at >= started_at)
+        .order_by(Message.created_at.desc(), Message.message_id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        ts, mid = decode_cursor(cursor, 2)
+        try:
+            ts = datetime.fromisoformat(ts)
+            mid = str(UUID(mid))
+        except (TypeError, ValueError, AttributeError):
+            raise HTTPException(400, "Invalid cursor")
+        q = q.where(Message.created_at <= ts, tuple_(Message.created_at, Message.message_id) < (ts, mid))
+
+    rows = (await db.execute(q)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at.isoformat(), rows[-1].message_id)
+    return {"items": [MessageOut.model_validate(r) for r in rows], "next_cursor": next_cursor}
+
+
+@router.get("/events", summary="Server-sent events for the current user's sessions", dependencies=[query_budget(1)])
+async def session_events(user: CurrentUser = Depends(get_current_user)):
+    """
+    One long-lived text/event-stream per device. Emits `message`,
+    `session_ended` and `reminder` events, a comment line every EVENTS_HEARTBEAT_SECONDS,
+    and a final `resync` event if the client fell too far behind (reload
+    history via /sessions/{id}/messages, then reconnect).
+    """
+    if not broker.can_subscribe(user.user_id):
+        raise HTTPException(429, "Too many open event streams")
+
+    async def stream():
+        # Subscribe only once the body is being sent: if the client is gone
+        # before that, this generator never runs and nothing is left behind
+        sub = broker.subscribe(user.user_id)
+        if sub is None:  # another stream took the last slot since the check
+            yield "retry: 5000\n\n"
+            return
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(sub.queue.get(), settings.EVENTS_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if sub.overflowed:
+                    yield "event: resync\ndata: {}\n\n"
+                    return
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        finally:
+            broker.unsubscribe(sub)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,102 @@
+from typing import Optional, Tuple
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth_cache import CurrentUser
+from app.conditional import current_version
+from app.metrics import query_budget
+from app.models import Journal, Session as ChatSession, Tombstone
+from app.pagination import encode_cursor, decode_cursor
+from app.schemas import Deletion, JournalOut, SessionOut, SyncPage
+from .auth import get_current_user, get_user_read_db
+from .journals import tags_subquery
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+# Tie-break order between streams that share a change_seq (backfilled rows are all 0)
+JOURNAL, SESSION, DELETION = 0, 1, 2
+
+
+@router.get("", response_model=SyncPage, summary="Changes since the last sync token", dependencies=[query_budget(5)])
+async def sync(
+    since: Optional[str] = Query(None, description="`next` from the previous response; omit for a full sync"),
+    limit: int = Query(200, ge=1, le=1000),
+    db: AsyncSession = Depends(get_user_read_db),
+    user: CurrentUser = Depends(get_current_user),
+):
+    """
+    Journals and sessions created or changed, and journals deleted, after
+    `since`, oldest change first and at most `limit` items per call.
+
+    Every write takes the next value of the user's data version under the
+    users row lock, so changes commit in change_seq order. Reading the
+    version first and capping every stream at it means a row that commits
+    mid-request can never be skipped by the returned token.
+    """
+    position = _parse_token(since)
+    high, _ = await current_version(db, user.user_id)
+
+    J, S, T = Journal, ChatSession, Tombstone
+    journals = (await db.execute(
+        select(J.change_seq, J.journal_id, J.content, J.mood, J.created_at, tags_subquery().label("tags"))
+        .where(J.user_id == user.user_id, J.change_seq <= high, _after(position, JOURNAL, J.change_seq, J.journal_id))
+        .order_by(J.change_seq, J.journal_id)
+        .limit(limit + 1)
+    )).mappings().all()
+    sessions = (await db.execute(
+        select(S.change_seq, S.session_id, S.session_type, S.started_at, S.ended_at)
+        .where(S.user_id == user.user_id, S.change_seq <= high, _after(position, SESSION, S.change_seq, S.session_id))
+        .order_by(S.change_seq, S.session_id)
+        .limit(limit + 1)
+    )).mappings().all()
+    deletions = (await db.execute(
+        select(T.change_seq, T.entity_id, T.entity, T.deleted_at)
+        .where(T.user_id == user.user_id, T.change_seq <= high, _after(position, DELETION, T.change_seq, T.entity_id))
+        .order_by(T.change_seq, T.entity_id)
+        .limit(limit + 1)
+    )).mappings().all()
+
+    merged = sorted(
+        [(r["change_seq"], JOURNAL, r["journal_id"], r) for r in journals]
+        + [(r["change_seq"], SESSION, r["session_id"], r) for r in sessions]
+        + [(r["change_seq"], DELETION, r["entity_id"], r) for r in deletions],
+        key=lambda item: item[:3],
+    )
+    has_more = len(merged) > limit
+    merged = merged[:limit]
+    if merged:
+        position = merged[-1][:3]
+
+    page = SyncPage(journals=[], sessions=[], deleted=[], next=encode_cursor(*position), has_more=has_more)
+    for _, kind, _, r in merged:
+        if kind == JOURNAL:
+            page.journals.append(JournalOut.model_validate(r))
+        elif kind == SESSION:
+            page.sessions.append(SessionOut.model_validate(r))
+        else:
+            page.deleted.append(Deletion(entity=r["entity"], id=r["entity_id"], deleted_at=r["deleted_at"]))
+    return page
+
+
+def _parse_token(since: Optional[str]) -> Tuple[int, int, str]:
+    if not since:
+        return (-1, JOURNAL, "")
+    seq, kind, last_id = decode_cursor(since, 3)
+    try:
+        seq, kind = int(seq), int(kind)
+        last_id = str(UUID(last_id))
+    except (TypeError, ValueError, AttributeError):
+        raise HTTPException(400, "Invalid sync token")
+    return seq, kind, last_id
+
+
+def _after(position: Tuple[int, int, str], kind: int, seq_col, id_col):
+    """Rows of stream `kind` strictly after position in (change_seq, kind, id) order."""
+    seq, last_kind, last_id = position
+    if kind > last_kind:
+        return seq_col >= seq
+    if kind < last_kind or not last_id:
+        return seq_col > seq
+    return tuple_(seq_col, id_col) > (seq, last_id)
@@ -0,0 +1,65 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select, literal
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth_cache import CurrentUser
+from app.db import get_db
+from app.metrics import query_budget
+from app.models import Tag, UserTagCount
+from app.tag_cache import tag_catalog
+from .auth import get_current_user
+
+router = APIRouter(prefix="/tags", tags=["tags"])
+
+
+@router.get("/suggest", summary="Tag autocomplete", dependencies=[query_budget(2)])
+async def suggest_tags(
+    prefix: str = Query(..., min_length=1, max_length=50),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user),
+):
+    """
+    The user's own most-used tags matching the prefix first, then global
+    matches in name order. One statement, both halves index-backed
+    (user_tag_counts by user, ix_tags_name_c for the prefix range).
+    """
+    prefix = prefix.strip().lower()
+    if not prefix:
+        return {"items": []}
+    name_c = Tag.name.collate("C")
+    # A plain range (not LIKE :p || '%') stays index-usable under generic plans
+    in_range = (name_c >= prefix) & (name_c < _prefix_end(prefix))
+    mine = (
+        select(Tag.tag_id, Tag.name, UserTagCount.entry_count.label("uses"), literal(0).label("src"))
+        .join(UserTagCount, UserTagCount.tag_id == Tag.tag_id)
+        .where(
+            UserTagCount.user_id == user.user_id,
+            UserTagCount.entry_count > 0,
+            in_range,
+        )
+        .order_by(UserTagCount.entry_count.desc(), name_c)
+        .limit(limit)
+    )
+    everyone = (
+        select(Tag.tag_id, Tag.name, literal(None).label("uses"), literal(1).label("src"))
+        .where(in_range)
+        .order_by(name_c)
+        .limit(limit)
+    )
+    rows = (await db.execute(mine.union_all(everyone))).all()
+
+    items, seen = [], set()
+    for r in sorted(rows, key=lambda r: r.src):  # stable: keeps each half's own order
+        if r.name in seen:
+            continue
+        seen.add(r.name)
+        items.append({"name": r.name, "uses": r.uses, "mine": r.src == 0})
+    # Suggestions are likely to be submitted next; warm the catalog for create_journal
+    tag_catalog.add({r.name: r.tag_id for r in rows})
+    return {"items": items[:limit]}
+
+
+def _prefix_end(prefix: str) -> str:
+    """Smallest string greater than every string starting with prefix (code point order)."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
@@ -1,31 +1,109 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select, func
+from typing import List
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from ..db import get_db
+from ..db import get_db, get_read_db
+from ..metrics import query_budget
 from .. import models, schemas
-from ..security import hash_password
+from ..accounts import get_user_by_email, normalize_email
+from ..auth_cache import CurrentUser, broadcast_invalidation, principal_cache
+from ..conditional import is_not_modified, not_modified, validators
+from ..security import hash_password_async
+from .auth import get_current_user, get_user_read_db
 
 router = APIRouter(prefix="/users", tags=["users"])
 
-@router.post("", response_model=schemas.UserOut, status_code=201)
+@router.post("", response_model=schemas.UserOut, status_code=201, dependencies=[query_budget(3)])
 async def create_user(payload: schemas.UserCreate, db: AsyncSession = Depends(get_db)):
-    # enforce case-insensitive uniqueness like DB index lower(email)
-    q = select(models.User).where(func.lower(models.User.email) == func.lower(payload.email))
-    existing = (await db.execute(q)).scalar_one_or_none()
-    if existing:
+    # Cheap early exit before paying for bcrypt; the unique index settles races
+    if await get_user_by_email(db, payload.email):
         raise HTTPException(409, "Email already registered")
 
     user = models.User(
-        email=payload.email,
+        email=normalize_email(payload.email),
         display_name=payload.display_name,
-        hashed_password=hash_password(payload.password),
+        hashed_password=await hash_password_async(payload.password),
     )
     db.add(user)
-    await db.commit()
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(409, "Email already registered")
     await db.refresh(user)
     return user
 
-@router.get("", response_model=list[schemas.UserOut])
-async def list_users(db: AsyncSession = Depends(get_db)):
-    res = await db.execute(select(models.User).order_by(models.User.created_at.desc()).limit(50))
-    return list(res.scalars().all())
+_user_list = TypeAdapter(List[schemas.UserOut])
+
+@router.get("", response_model=list[schemas.UserOut], dependencies=[query_budget(1)])
+async def list_users(db: AsyncSession = Depends(get_read_db)):
+    # Only the UserOut columns (never hashed_password), as Core rows
+    U = models.User
+    res = await db.execute(
+        select(U.user_id, U.email, U.display_name, U.is_active, U.created_at)
+        .order_by(U.created_at.desc())
+        .limit(50)
+    )
+    users = _user_list.validate_python(res.mappings().all())
+    return Response(content=_user_list.dump_json(users), media_type="application/json")
+
+
+@router.get("/me", response_model=schemas.UserOut, dependencies=[query_budget(2)])
+async def read_me(
+    request: Request,
+    db: AsyncSession = Depends(get_user_read_db),
+    user: CurrentUser = Depends(get_current_user),
+):
+    """Current user's profile, with ETag/Last-Modified; 304 on a matching If-None-Match."""
+    U = models.User
+    res = await db.execute(
+        select(U.user_id, U.email, U.display_name, U.is_active, U.created_at, U.data_version, U.data_modified_at)
+        .where(U.user_id == user.user_id)
+    )
+    row = res.one()
+    headers = validators(user.user_id, row.data_version, row.data_modified_at, "profile")
+    if is_not_modified(request, headers):
+        return not_modified(headers)
+    body = schemas.UserOut.model_validate(row._mapping).model_dump_json().encode()
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.delete("/me", status_code=202, dependencies=[query_budget(6)])
+async def delete_me(
+    db: AsyncSession = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user),
+):
+    """
+    Deactivate the account now and queue its data for removal by the
+    background purge (app.account_purge). Poll the returned deletion_id at
+    GET /users/deletions/{deletion_id}.
+    """
+    U, R, D = models.User, models.Reminder, models.AccountDeletion
+    await db.execute(update(U).where(U.user_id == user.user_id).values(is_active=False, updated_at=func.now()))
+    await db.execute(update(R).where(R.user_id == user.user_id).values(is_active=False))
+    await db.execute(pg_insert(D).values(user_id=user.user_id).on_conflict_do_nothing(index_elements=["user_id"]))
+    res = await db.execute(select(D.deletion_id, D.status).where(D.user_id == user.user_id))
+    row = res.one()
+    await broadcast_invalidation(db, user.user_id)
+    await db.commit()
+    # Here at once; other workers when the notification arrives
+    principal_cache.invalidate_user(user.user_id)
+    return {"deletion_id": row.deletion_id, "status": row.status}
+
+
+@router.get("/deletions/{deletion_id}", dependencies=[query_budget(1)])
+async def deletion_status(deletion_id: UUID, db: AsyncSession = Depends(get_db)):
+    """Progress of an account deletion. The unguessable id is the only credential (the account is inactive)."""
+    D = models.AccountDeletion
+    res = await db.execute(
+        select(D.deletion_id, D.status, D.phase, D.rows_deleted, D.requested_at, D.updated_at, D.finished_at)
+        .where(D.deletion_id == str(deletion_id))
+    )
+    row = res.mappings().one_or_none()
+    if row is None:
+        raise HTTPException(404, "Not found")
+    return dict(row)
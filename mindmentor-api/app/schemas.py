@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional, List, Union
+from typing import Optional, List, Literal, Union
 from pydantic import BaseModel, EmailStr, Field, ConfigDict, field_validator
 from uuid import UUID
 
@@ -43,12 +43,61 @@ class JournalCreate(BaseModel):
             return [str(x).strip() for x in v if str(x).strip()]
         return []
 
+class JournalImport(JournalCreate):
+    # Original timestamp from the app being migrated from; defaults to now()
+    created_at: Optional[datetime] = None
+
+class JournalBulkCreate(BaseModel):
+    entries: List[JournalImport] = Field(min_length=1)
+
 class JournalOut(BaseModel):
+    # Everything but journal_id is optional so list endpoints can return sparse
+    # fieldsets (?fields=); dump with exclude_unset to omit unrequested fields
+    model_config = ConfigDict(from_attributes=True)
     journal_id: str
-    user_id: str
+    user_id: Optional[str] = None
+    content: Optional[str] = None
+    mood: Optional[int] = None
+    created_at: Optional[datetime] = None
+    tags: Optional[List[str]] = None
+
+class JournalPage(BaseModel):
+    items: List[JournalOut]
+    next_cursor: Optional[str] = None
+
+# ---------- Sessions / Messages ----------
+class SessionCreate(BaseModel):
+    session_type: Literal["chat", "checkin", "exercise"] = "chat"
+
+class SessionOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    session_id: str
+    session_type: str
+    started_at: datetime
+    ended_at: Optional[datetime] = None
+
+# ---------- Sync ----------
+class Deletion(BaseModel):
+    entity: Literal["journal", "session"]
+    id: str
+    deleted_at: datetime
+
+class SyncPage(BaseModel):
+    """Changes after the `since` token; keep calling with `next` while has_more."""
+    journals: List[JournalOut]
+    sessions: List[SessionOut]
+    deleted: List[Deletion]
+    next: str
+    has_more: bool
+
+class MessageCreate(BaseModel):
+    # No role: clients only post as "user"; mentor/system messages are created server-side
+    content: str = Field(min_length=1)
+
+class MessageOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    message_id: str
+    session_id: str
+    role: str
     content: str
-    mood: Optional[int]
     created_at: datetime
-    tags: List[str] = []
-    class Config:
-        from_attributes = True
@@ -1,3 +1,7 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from passlib.context import CryptContext
 from jose import jwt
@@ -12,6 +16,74 @@ def hash_password(p: str) -> str:
 def verify_password(p: str, hashed: str) -> bool:
     return pwd_context.verify(p, hashed)
 
+
+# ---------- Off-loop hashing ----------
+# bcrypt releases the GIL, so a small thread pool gives real parallelism and
+# keeps the event loop free. Admission is bounded: at most WORKERS running plus
+# MAX_QUEUE waiting; anything beyond that fails fast with PasswordHasherBusy.
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing pool and its wait queue are full."""
+
+_hash_pool = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+_hash_lock = threading.Lock()
+_hash_pending = 0  # submitted and not finished (running + queued); event-loop side only
+_hash_stats = {"running": 0, "calls": 0, "rejected": 0, "seconds_total": 0.0, "seconds_max": 0.0}
+
+def _timed(fn, *args):
+    with _hash_lock:
+        _hash_stats["running"] += 1
+    t0 = time.perf_counter()
+    try:
+        return fn(*args)
+    finally:
+        elapsed = time.perf_counter() - t0
+        with _hash_lock:
+            _hash_stats["running"] -= 1
+            _hash_stats["calls"] += 1
+            _hash_stats["seconds_total"] += elapsed
+            _hash_stats["seconds_max"] = max(_hash_stats["seconds_max"], elapsed)
+
+async def _run_hasher(fn, *args):
+    global _hash_pending
+    if _hash_pending >= settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_MAX_QUEUE:
+        _hash_stats["rejected"] += 1
+        raise PasswordHasherBusy()
+    _hash_pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_pool, _timed, fn, *args)
+    finally:
+        _hash_pending -= 1
+
+async def hash_password_async(p: str) -> str:
+    return await _run_hasher(hash_password, p)
+
+async def verify_password_async(p: str, hashed: str) -> bool:
+    return await _run_hasher(verify_password, p, hashed)
+
+def hasher_stats() -> dict:
+    with _hash_lock:
+        stats = dict(_hash_stats)
+    stats["workers"] = settings.PASSWORD_HASH_WORKERS
+    stats["queued"] = max(_hash_pending - stats["running"], 0)
+    stats["seconds_avg"] = stats["seconds_total"] / stats["calls"] if stats["calls"] else 0.0
+    return stats
+
+
+async def warm_up() -> None:
+    """
+    Pay one-time setup before the first login: passlib picks and loads its
+    bcrypt backend on first use, the hash pool starts its threads lazily, and
+    jose resolves its HMAC backend on the first encode/decode.
+    """
+    hashed = await asyncio.get_running_loop().run_in_executor(_hash_pool, hash_password, "warm-up")
+    await asyncio.gather(*(
+        asyncio.get_running_loop().run_in_executor(_hash_pool, verify_password, "warm-up", hashed)
+        for _ in range(settings.PASSWORD_HASH_WORKERS)
+    ))
+    decode_token(create_access_token("warm-up"))
+
+
 def create_access_token(sub: str, expires_minutes: int | None = None) -> str:
     exp = datetime.now(tz=timezone.utc) + timedelta(minutes=expires_minutes or settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     payload = {"sub": sub, "exp": exp}
@@ -0,0 +1,272 @@
+# app/similarity.py
+"""
+"Related entries" for GET /journals/{id}/related.
+
+Each journal gets a fixed-size hashed bag-of-words vector (words plus its
+tags, sublinear term frequency, signed feature hashing, L2-normalized),
+computed on insert and stored as float16 bytes in journals.content_vec
+(VECTOR_DIM * 2 bytes per row). Nothing leaves the process.
+
+Scoring loads the user's vectors into one float32 matrix and ranks every
+entry with a single matrix-vector product. Hashed dimensions are weighted
+by a per-user IDF (from how many of the user's entries use each
+dimension), so words the user writes every day count for little.
+
+Matrices are cached per user with the data version they reflect. When the
+version moves, only the delta is fetched: journals with a newer change_seq
+and tombstones for deleted ones (see /sync), not the whole history.
+
+Rows written before content_vec existed are filled in by:
+
+    python -m app.similarity
+"""
+import asyncio
+import logging
+import re
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.conditional import bump_data_versions
+from app.config import settings
+from app.models import Journal, JournalTag, Tag, Tombstone
+
+log = logging.getLogger("mindmentor.similarity")
+
+# Changing this invalidates every stored vector (re-run the backfill with a cleared column)
+VECTOR_DIM = 256
+TAG_WEIGHT = 2.0
+
+_WORD = re.compile(r"[a-z0-9']{2,}")
+_STOPWORDS = frozenset(
+    "a an and are as at be but by for from had has have he her him his i i'm im in is it it's its "
+    "me my of on or our so that the their them then there they this to too was we were what when "
+    "which who will with you your".split()
+)
+
+
+def _features(content: str, tags: Sequence[str]) -> Tuple[List[str], List[float]]:
+    counts: Dict[str, float] = {}
+    for w in _WORD.findall(content.lower()):
+        if w not in _STOPWORDS:
+            counts[w] = counts.get(w, 0.0) + 1.0
+    feats = list(counts)
+    weights = [1.0 + np.log(c) for c in counts.values()]  # sublinear tf
+    feats += [f"#{t}" for t in tags]
+    weights += [TAG_WEIGHT] * len(tags)
+    return feats, weights
+
+
+def embed(content: str, tags: Sequence[str] = ()) -> bytes:
+    """Hashed, L2-normalized float16 vector for one entry, as bytes for content_vec."""
+    feats, weights = _features(content, tags)
+    vec = np.zeros(VECTOR_DIM, dtype=np.float32)
+    if feats:
+        # crc32 is stable across processes (unlike hash()); the top bit picks the sign
+        h = np.fromiter((zlib.crc32(f.encode()) for f in feats), dtype=np.uint32, count=len(feats))
+        sign = np.where(h & 0x80000000, -1.0, 1.0).astype(np.float32)
+        np.add.at(vec, h % VECTOR_DIM, sign * np.asarray(weights, dtype=np.float32))
+        norm = np.linalg.norm(vec)
+        if norm:
+            vec /= norm
+    return vec.astype(np.float16).tobytes()
+
+
+def _matrix(blobs: Sequence[bytes]) -> np.ndarray:
+    if not blobs:
+        return np.zeros((0, VECTOR_DIM), dtype=np.float32)
+    return np.frombuffer(b"".join(blobs), dtype=np.float16).reshape(len(blobs), VECTOR_DIM).astype(np.float32)
+
+
+@dataclass
+class UserMatrix:
+    version: int
+    ids: np.ndarray      # journal_id per row (object array)
+    vectors: np.ndarray  # (n, VECTOR_DIM) float32
+    idf2: np.ndarray = None
+    norms: np.ndarray = None
+
+    def __post_init__(self):
+        self._reweight()
+
+    @property
+    def nbytes(self) -> int:
+        return self.vectors.nbytes + self.ids.nbytes
+
+    def _reweight(self) -> None:
+        n = len(self.ids)
+        df = np.count_nonzero(self.vectors, axis=0)
+        idf = np.log((1.0 + n) / (1.0 + df)) + 1.0
+        self.idf2 = (idf * idf).astype(np.float32)
+        self.norms = np.sqrt((self.vectors * self.vectors) @ self.idf2)
+
+    def apply(self, version: int, ids: List[str], blobs: List[bytes], deleted: List[str]) -> None:
+        """Fold a delta in: drop deleted/changed rows, append the new ones."""
+        gone = set(deleted) | set(ids)
+        if gone:
+            keep = ~np.isin(self.ids, list(gone))
+            self.ids, self.vectors = self.ids[keep], self.vectors[keep]
+        if ids:
+            self.ids = np.concatenate([self.ids, np.array(ids, dtype=object)])
+            self.vectors = np.vstack([self.vectors, _matrix(blobs)])
+        self.version = version
+        self._reweight()
+
+    def related(self, journal_id: str, k: int) -> Optional[List[Tuple[str, float]]]:
+        """Top-k (journal_id, cosine) by IDF-weighted cosine; None if journal_id has no vector."""
+        hit = np.flatnonzero(self.ids == journal_id)
+        if hit.size == 0:
+            return None
+        row = hit[0]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = (self.vectors @ (self.vectors[row] * self.idf2)) / (self.norms * self.norms[row])
+        scores = np.nan_to_num(scores, nan=0.0)
+        scores[row] = -np.inf
+        k = min(k, len(scores) - 1)
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        top = top[scores[top] > 0]
+        return list(zip(self.ids[top].tolist(), scores[top].astype(np.float64).round(4).tolist()))
+
+
+class SimilarityCache:
+    """Per-user matrices, least recently used evicted past max_bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._users: "OrderedDict[str, Tuple[UserMatrix, int]]" = OrderedDict()  # -> (matrix, bytes)
+        self._bytes = 0
+        self.full_loads = self.delta_loads = self.hits = 0
+
+    async def get(self, db: AsyncSession, user_id: str, version: int) -> UserMatrix:
+        """The user's matrix as of `version` (the caller's snapshot of users.data_version)."""
+        cached = self._users.get(user_id)
+        m = cached[0] if cached else None
+        if m is None or m.version > version:  # newer than our snapshot (replica lag): rebuild
+            m = await self._load(db, user_id, version)
+            self.full_loads += 1
+        elif m.version < version:
+            # Applying the same delta twice (concurrent requests) is harmless
+            await self._load_delta(db, user_id, m, version)
+            self.delta_loads += 1
+        else:
+            self.hits += 1
+        self._store(user_id, m)
+        return m
+
+    def _store(self, user_id: str, m: UserMatrix) -> None:
+        old = self._users.pop(user_id, None)
+        if old is not None:
+            self._bytes -= old[1]
+        self._users[user_id] = (m, m.nbytes)
+        self._bytes += m.nbytes
+        while self._bytes > self.max_bytes and len(self._users) > 1:
+            _, (_, size) = self._users.popitem(last=False)
+            self._bytes -= size
+
+    def stats(self) -> dict:
+        return {
+            "users": len(self._users),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "delta_loads": self.delta_loads,
+            "full_loads": self.full_loads,
+        }
+
+    async def _load(self, db: AsyncSession, user_id: str, version: int) -> UserMatrix:
+        res = await db.execute(
+            select(Journal.journal_id, Journal.content_vec)
+            .where(Journal.user_id == user_id, Journal.content_vec.is_not(None), Journal.change_seq <= version)
+        )
+        rows = res.all()
+        return UserMatrix(
+            version=version,
+            ids=np.array([r[0] for r in rows], dtype=object),
+            vectors=_matrix([r[1] for r in rows]),
+        )
+
+    async def _load_delta(self, db: AsyncSession, user_id: str, m: UserMatrix, version: int) -> None:
+        res = await db.execute(
+            select(Journal.journal_id, Journal.content_vec).where(
+                Journal.user_id == user_id,
+                Journal.content_vec.is_not(None),
+                Journal.change_seq > m.version,
+                Journal.change_seq <= version,
+            )
+        )
+        rows = res.all()
+        res = await db.execute(
+            select(Tombstone.entity_id).where(
+                Tombstone.user_id == user_id,
+                Tombstone.entity == "journal",
+                Tombstone.change_seq > m.version,
+                Tombstone.change_seq <= version,
+            )
+        )
+        m.apply(version, [r[0] for r in rows], [r[1] for r in rows], list(res.scalars()))
+
+
+similarity_cache = SimilarityCache(settings.SIMILARITY_CACHE_MAX_BYTES)
+
+
+async def backfill(batch_size: int = 500) -> int:
+    """
+    Compute content_vec for rows that predate it; returns how many were
+    filled. Each batch bumps its users' data versions like any other write.
+    """
+    from app.db import SessionLocal
+
+    total = 0
+    while True:
+        async with SessionLocal() as db:
+            rows = (await db.execute(
+                select(Journal.journal_id, Journal.user_id, Journal.content)
+                .where(Journal.content_vec.is_(None))
+                .limit(batch_size)
+            )).all()
+            if not rows:
+                return total
+            # Cached matrices are keyed on the data version, so bump it and
+            # re-stamp the rows; the next request folds them in as a delta
+            counts: Dict[str, int] = {}
+            for r in rows:
+                counts[r.user_id] = counts.get(r.user_id, 0) + 1
+            versions = await bump_data_versions(db, counts)
+            seqs = {uid: versions[uid] - n for uid, n in counts.items()}
+            ids = [r.journal_id for r in rows]
+            tags: Dict[str, List[str]] = {}
+            res = await db.execute(
+                select(JournalTag.c.journal_id, Tag.name)
+                .join(Tag, Tag.tag_id == JournalTag.c.tag_id)
+                .where(JournalTag.c.journal_id.in_(ids))
+            )
+            for jid, name in res.all():
+                tags.setdefault(jid, []).append(name)
+            params = []
+            for r in rows:
+                seqs[r.user_id] += 1
+                params.append({
+                    "journal_id": r.journal_id,
+                    "content_vec": embed(r.content, tags.get(r.journal_id, [])),
+                    "change_seq": seqs[r.user_id],
+                })
+            await db.execute(update(Journal), params)
+            await db.commit()
+        total += len(rows)
+        log.info("backfilled %d journal vectors", total)
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(levelname)-5.5s [%(name)s] %(message)s")
+    asyncio.run(backfill())
+
+
+if __name__ == "__main__":
+    main()
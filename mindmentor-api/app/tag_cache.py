@@ -0,0 +1,50 @@
+# app/tag_cache.py
+"""
+Bounded in-process LRU of tag name -> tag_id, shared by create_journal
+(via journal_writes.upsert_tags) and tag autocomplete.
+
+Tags are never renamed or deleted, so a cached mapping cannot go stale
+and warm tags need no database lookup at all.
+"""
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Tuple
+
+from app.config import settings
+
+
+class TagCatalog:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._ids: "OrderedDict[str, int]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, names: Iterable[str]) -> Tuple[Dict[str, int], List[str]]:
+        """Split names into ({cached name: tag_id}, [uncached names])."""
+        found, missing = {}, []
+        for n in names:
+            tag_id = self._ids.get(n)
+            if tag_id is None:
+                missing.append(n)
+            else:
+                self._ids.move_to_end(n)
+                found[n] = tag_id
+        self.hits += len(found)
+        self.misses += len(missing)
+        return found, missing
+
+    def add(self, ids: Dict[str, int]) -> None:
+        for name, tag_id in ids.items():
+            self._ids[name] = tag_id
+            self._ids.move_to_end(name)
+        while len(self._ids) > self.max_entries:
+            self._ids.popitem(last=False)
+
+    def clear(self) -> None:
+        self._ids.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._ids), "max_entries": self.max_entries, "hits": self.hits, "misses": self.misses}
+
+
+tag_catalog = TagCatalog(settings.TAG_CACHE_MAX_ENTRIES)
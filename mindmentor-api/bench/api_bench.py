@@ -0,0 +1,238 @@
+"""
+In-process load/latency benchmark for the MindMentor API.
+
+Drives the real FastAPI app through httpx's ASGI transport (no network,
+no uvicorn) against a local, migrated Postgres, and reports throughput and
+p50/p95/p99 per scenario as JSON so runs can be compared.
+
+    pip install httpx
+    alembic upgrade head                       # on a throwaway database!
+    python bench/api_bench.py --out bench/results.json
+    python bench/api_bench.py --compare bench/results.json   # exit 1 on regression
+
+It creates users and journals and does not clean up after itself; point
+--database-url (or DATABASE_URL) at a disposable database.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+# Make the app importable when running from the project root (as alembic/env.py does)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)) + "/..")
+
+WORDS = (
+    "today work sleep anxious calm walk friend family gym tired grateful coffee rain "
+    "meeting deadline stress happy sad focus reading music dinner project run breathe"
+).split()
+TAGS = ["daily", "work", "sleep", "family", "health", "gratitude", "stress", "focus", "mood", "exercise"]
+
+
+def _content(rng: random.Random, words: int = 60) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def _percentile(sorted_ms, p: float) -> float:
+    if not sorted_ms:
+        return 0.0
+    # nearest-rank
+    k = max(0, min(len(sorted_ms) - 1, math.ceil(p / 100 * len(sorted_ms)) - 1))
+    return sorted_ms[k]
+
+
+class Recorder:
+    def __init__(self):
+        self.results = {}
+
+    async def run(self, name, n, concurrency, make_request):
+        """Run make_request(i) n times with bounded concurrency; record latencies."""
+        latencies, errors, limited = [], 0, 0
+        sem = asyncio.Semaphore(concurrency)
+
+        async def one(i):
+            nonlocal errors, limited
+            async with sem:
+                t0 = time.perf_counter()
+                resp = await make_request(i)
+                latencies.append((time.perf_counter() - t0) * 1000)
+                if resp.status_code == 429:
+                    limited += 1
+                elif resp.status_code >= 400:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(n)))
+        wall = time.perf_counter() - start
+
+        ms = sorted(latencies)
+        self.results[name] = {
+            "count": n,
+            "errors": errors,
+            "rate_limited": limited,
+            "concurrency": concurrency,
+            "rps": round(n / wall, 2) if wall else 0.0,
+            "mean_ms": round(statistics.fmean(ms), 3) if ms else 0.0,
+            "p50_ms": round(_percentile(ms, 50), 3),
+            "p95_ms": round(_percentile(ms, 95), 3),
+            "p99_ms": round(_percentile(ms, 99), 3),
+        }
+        r = self.results[name]
+        print(f"{name:<28} n={n:<6} err={errors:<4} 429={limited:<4} rps={r['rps']:<9} "
+              f"p50={r['p50_ms']:<9} p95={r['p95_ms']:<9} p99={r['p99_ms']}", file=sys.stderr)
+
+
+async def bench(args) -> dict:
+    import httpx
+    from app.main import app
+
+    rng = random.Random(args.seed)
+    run_id = uuid.uuid4().hex[:8]
+    password = "bench-password-1"
+    rec = Recorder()
+    transport = httpx.ASGITransport(app=app)
+
+    # ASGITransport sends no lifespan events; run startup/shutdown (warm-up, drain) ourselves
+    async with app.router.lifespan_context(app), \
+            httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        # --- register / login
+        emails = [f"bench-{run_id}-{i}@example.com" for i in range(args.users)]
+        await rec.run("register", args.users, args.concurrency, lambda i: client.post(
+            "/auth/register", json={"email": emails[i], "password": password}))
+        tokens = [None] * args.users
+
+        async def login(i):
+            resp = await client.post("/auth/login", json={"email": emails[i % args.users], "password": password})
+            if resp.status_code == 200:
+                tokens[i % args.users] = resp.json()["access_token"]
+            return resp
+        await rec.run("login", max(args.users, args.requests // 4), args.concurrency, login)
+        tokens = [t for t in tokens if t]
+        if not tokens:
+            raise SystemExit("No user could log in; is the database migrated and reachable?")
+        headers = [{"Authorization": f"Bearer {t}"} for t in tokens]
+
+        # --- seed history through the bulk endpoint (not measured)
+        now = datetime.now(timezone.utc).timestamp()
+        for h in headers:
+            for start in range(0, args.journals_per_user, 1000):
+                entries = [{
+                    "content": _content(rng),
+                    "mood": rng.randint(1, 10),
+                    "tags": rng.sample(TAGS, k=min(len(TAGS), args.tags)),
+                    "created_at": datetime.fromtimestamp(now - rng.randint(0, 365 * 86400), timezone.utc).isoformat(),
+                } for _ in range(min(1000, args.journals_per_user - start))]
+                resp = await client.post("/journals/bulk", json={"entries": entries}, headers=h)
+                resp.raise_for_status()
+
+        # --- journal scenarios
+        created = []
+
+        async def create(i):
+            resp = await client.post("/journals", headers=headers[i % len(headers)], json={
+                "content": _content(rng), "mood": rng.randint(1, 10),
+                "tags": rng.sample(TAGS, k=min(len(TAGS), args.tags)),
+            })
+            if resp.status_code == 201:
+                created.append((i % len(headers), resp.json()["journal_id"]))
+            return resp
+        await rec.run(f"create_journal_{args.tags}_tags", args.requests, args.concurrency, create)
+
+        await rec.run("list_journals_first_page", args.requests, args.concurrency, lambda i: client.get(
+            "/journals", params={"limit": 20}, headers=headers[i % len(headers)]))
+        deep = max(0, min(args.deep_offset, args.journals_per_user - 20))
+        await rec.run(f"list_journals_offset_{deep}", args.requests, args.concurrency, lambda i: client.get(
+            "/journals", params={"limit": 20, "offset": deep}, headers=headers[i % len(headers)]))
+
+        # Same depth via keyset cursors; walking to the start page is not measured
+        cursors = []
+        for h in headers:
+            cursor, seen = "", 0
+            while seen < deep and cursor is not None:
+                page = (await client.get("/journals", params={"limit": 100, "cursor": cursor}, headers=h)).json()
+                cursor, seen = page["next_cursor"], seen + len(page["items"])
+            cursors.append(cursor or "")
+        await rec.run(f"list_journals_cursor_{deep}", args.requests, args.concurrency, lambda i: client.get(
+            "/journals", params={"limit": 20, "cursor": cursors[i % len(headers)]}, headers=headers[i % len(headers)]))
+
+        await rec.run("delete_journal", len(created), args.concurrency, lambda i: client.delete(
+            f"/journals/{created[i][1]}", headers=headers[created[i][0]]))
+
+    return {
+        "meta": {
+            "run_id": run_id,
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "users": args.users,
+            "journals_per_user": args.journals_per_user,
+            "tags": args.tags,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "results": rec.results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> bool:
+    """Print a p95/rps comparison; return True if any scenario regressed past threshold."""
+    regressed = False
+    for name, cur in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        p95 = (cur["p95_ms"] - base["p95_ms"]) / base["p95_ms"] if base["p95_ms"] else 0.0
+        rps = (cur["rps"] - base["rps"]) / base["rps"] if base["rps"] else 0.0
+        bad = p95 > threshold or rps < -threshold
+        regressed |= bad
+        print(f"{'REGRESSION' if bad else 'ok':<10} {name:<28} p95 {p95:+.1%}  rps {rps:+.1%}", file=sys.stderr)
+    return regressed
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--database-url", help="overrides DATABASE_URL for this run")
+    p.add_argument("--users", type=int, default=10)
+    p.add_argument("--journals-per-user", type=int, default=2000)
+    p.add_argument("--tags", type=int, default=3, help="tags per created journal")
+    p.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    p.add_argument("--concurrency", type=int, default=10)
+    p.add_argument("--deep-offset", type=int, default=1500)
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--out", help="write JSON results here (default: stdout)")
+    p.add_argument("--compare", help="baseline JSON to compare against")
+    p.add_argument("--threshold", type=float, default=0.2, help="allowed relative p95/rps change")
+    args = p.parse_args()
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    # All traffic shares one client address through ASGITransport, so the auth
+    # rate limits would turn most logins into 429s; measure bcrypt, not them
+    for name in ("AUTH_IP_RATE_PER_MINUTE", "AUTH_IP_BURST", "AUTH_USER_RATE_PER_MINUTE", "AUTH_USER_BURST"):
+        os.environ[name] = "0"
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    result = asyncio.run(bench(args))
+    out = json.dumps(result, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(out + "\n")
+    else:
+        print(out)
+
+    if baseline is not None and compare(result, baseline, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()